@@ -1,9 +1,29 @@
 import { NextResponse } from 'next/server';
-import dbConnect from '@/lib/dbConnect';
+import dbConnect, { getPoolStats } from '@/lib/dbConnect';
 import User from '@/models/User';
 import LeaveRequest from '@/models/LeaveRequest';
 import { auth } from '@/lib/firebaseAdmin';
+import { verifyIdToken, getTokenCacheStats } from '@/lib/tokenCache';
+import { getProfile, invalidateProfile, getProfileCacheStats } from '@/lib/profileCache';
+import {
+  AttachmentTooLargeError,
+  MAX_ATTACHMENT_BYTES,
+  findAttachment,
+  openAttachmentStream,
+  parseRange,
+  safeContentType,
+  saveAttachment,
+} from '@/lib/attachmentStore';
+import { MAX_BATCH_SIZE, applyLeaveDecision, applyLeaveDecisions } from '@/lib/leaveDecisions';
+import { validateNewLeave } from '@/lib/leaveValidation';
+import { getLeaveSummary, rebuildLeaveSummaries, recordLeaveCreated } from '@/lib/leaveSummary';
+import { EXPORT_FORMATS, buildExportFilter, streamLeaveExport } from '@/lib/leaveExport';
+import { LEAVE_PROJECTION, USER_PROJECTION, toLeaveDTO, toUserDTO } from '@/lib/serializers';
+import { getOrgStats, invalidateOrgStats, getOrgStatsCacheStats } from '@/lib/orgStats';
+import { getRouteTimings, span, withTrace } from '@/lib/tracing';
+import { subscribePending } from '@/lib/pendingFeed';
 import { v4 as uuidv4 } from 'uuid';
+import { createHash, timingSafeEqual } from 'crypto';
 
 // Helper function to get user from token
 async function getUserFromToken(request) {
@@ -14,7 +34,7 @@ async function getUserFromToken(request) {
     }
     
     const idToken = authHeader.split('Bearer ')[1];
-    const decodedToken = await auth.verifyIdToken(idToken);
+    const decodedToken = await span('auth', () => verifyIdToken(idToken));
     return decodedToken;
   } catch (error) {
     console.error('Auth error:', error);
@@ -22,6 +42,147 @@ async function getUserFromToken(request) {
   }
 }
 
+// Helper function to resolve the caller and their (cached, lean) profile
+async function getPrincipal(request) {
+  const user = await getUserFromToken(request);
+  if (!user) {
+    return null;
+  }
+
+  await dbConnect();
+  const profile = await getProfile(user.uid);
+  return { user, profile };
+}
+
+const isApprover = (profile) => Boolean(profile) && ['Manager', 'HR'].includes(profile.role);
+
+// True when an If-None-Match / If-Range header value names this ETag
+function etagMatches(header, etag) {
+  if (!header) {
+    return false;
+  }
+  return header.split(',').some((tag) => {
+    const candidate = tag.trim();
+    return candidate === '*' || candidate === etag || candidate === `W/${etag}`;
+  });
+}
+
+// Version of the leave requests matching `filter`: their count plus the latest
+// updatedAt. Any create, decision or removal in the scope changes it. Both
+// reads are index-only ({ scope, updatedAt } indexes and a count scan).
+async function leaveScopeVersion(filter) {
+  const [count, latest] = await Promise.all([
+    LeaveRequest.countDocuments(filter),
+    LeaveRequest.findOne(filter, { _id: 0, updatedAt: 1 }).sort({ updatedAt: -1 }).lean(),
+  ]);
+  return `${count}.${latest?.updatedAt?.getTime() || 0}`;
+}
+
+const versionTag = (...parts) =>
+  `W/"${createHash('sha1').update(parts.join('|')).digest('base64url')}"`;
+
+// Answer 304 when the client already has `etag`, otherwise build the body.
+// The tag is computed before the body, so a write racing with the request can
+// only make the tag older than the body (one extra refetch), never newer.
+async function conditionalJson(request, etag, getBody) {
+  const headers = { ETag: etag, 'Cache-Control': 'private, no-cache' };
+  if (etagMatches(request.headers.get('if-none-match'), etag)) {
+    return new Response(null, { status: 304, headers });
+  }
+
+  const body = await getBody();
+  if (body instanceof Response) {
+    return body;
+  }
+  const response = jsonResponse(body);
+  Object.entries(headers).forEach(([name, value]) => response.headers.set(name, value));
+  return response;
+}
+
+// NextResponse.json() for payloads large enough that serializing them shows up
+// in the Server-Timing breakdown
+const jsonResponse = (body, init) => span('serialize', () => NextResponse.json(body, init));
+
+const DEFAULT_PAGE_SIZE = 50;
+const MAX_PAGE_SIZE = 200;
+
+// Cursors are the (createdAt, id) sort key of the last row served
+function encodeCursor(leave) {
+  return Buffer.from(JSON.stringify([leave.createdAt, leave.id])).toString('base64url');
+}
+
+function decodeCursor(cursor) {
+  try {
+    const [createdAt, id] = JSON.parse(Buffer.from(cursor, 'base64url').toString());
+    const date = new Date(createdAt);
+    return typeof id === 'string' && !Number.isNaN(date.getTime()) ? { createdAt: date, id } : null;
+  } catch (error) {
+    return null;
+  }
+}
+
+const LEAVE_STATUSES = LeaveRequest.schema.path('status').enumValues;
+const LEAVE_TYPES = LeaveRequest.schema.path('type').enumValues;
+
+// Keyset pagination over (createdAt, id), newest first. List rows leave out the
+// attachment blob unless ?include=attachment is passed, and carry hasAttachment.
+// ?status= and ?type= narrow the list where `filter` does not fix them already.
+// With { withTotal }, the first page also carries the number of matching rows.
+// Returns null when the cursor or a filter value is malformed.
+async function findLeavesPage(filter, searchParams, { withTotal = false } = {}) {
+  const limit = Math.min(
+    Math.max(parseInt(searchParams.get('limit'), 10) || DEFAULT_PAGE_SIZE, 1),
+    MAX_PAGE_SIZE
+  );
+  const match = { ...filter };
+
+  for (const [param, allowed] of [['status', LEAVE_STATUSES], ['type', LEAVE_TYPES]]) {
+    const value = searchParams.get(param);
+    if (value && !(param in filter)) {
+      if (!allowed.includes(value)) {
+        return null;
+      }
+      match[param] = value;
+    }
+  }
+  const countFilter = { ...match };
+
+  if (searchParams.get('cursor')) {
+    const cursor = decodeCursor(searchParams.get('cursor'));
+    if (!cursor) {
+      return null;
+    }
+    match.createdAt = { $lte: cursor.createdAt };
+    match.$nor = [{ createdAt: cursor.createdAt, id: { $gte: cursor.id } }];
+  }
+
+  const pipeline = [
+    { $match: match },
+    { $sort: { createdAt: -1, id: -1 } },
+    { $limit: limit + 1 },
+    {
+      $project: searchParams.get('include') === 'attachment'
+        ? { ...LEAVE_PROJECTION, attachment: { $ifNull: ['$attachment', null] } }
+        : LEAVE_PROJECTION,
+    },
+  ];
+
+  const [items, total] = await Promise.all([
+    LeaveRequest.aggregate(pipeline),
+    withTotal && !searchParams.get('cursor') ? LeaveRequest.countDocuments(countFilter) : undefined,
+  ]);
+  const hasMore = items.length > limit;
+  if (hasMore) {
+    items.pop();
+  }
+
+  return {
+    items,
+    nextCursor: hasMore ? encodeCursor(items[items.length - 1]) : null,
+    ...(total !== undefined && { total }),
+  };
+}
+
 // GET /api/user - Get current user profile
 async function handleGetUser(request) {
   const user = await getUserFromToken(request);
@@ -30,13 +191,13 @@ async function handleGetUser(request) {
   }
 
   await dbConnect();
-  const userProfile = await User.findOne({ uid: user.uid });
+  const userProfile = await User.findOne({ uid: user.uid }, USER_PROJECTION).lean();
   
   if (!userProfile) {
     return NextResponse.json({ error: 'User not found' }, { status: 404 });
   }
 
-  return NextResponse.json(userProfile);
+  return jsonResponse(userProfile);
 }
 
 // POST /api/auth/register
@@ -44,7 +205,7 @@ async function handleRegister(request) {
   try {
     const { idToken, displayName, department, phoneNumber } = await request.json();
     
-    const decodedToken = await auth.verifyIdToken(idToken);
+    const decodedToken = await span('auth', () => verifyIdToken(idToken));
     const { uid, email } = decodedToken;
     
     await auth.setCustomUserClaims(uid, { role: 'Employee' });
@@ -59,8 +220,9 @@ async function handleRegister(request) {
       phoneNumber,
       lastLogin: new Date(),
     });
+    invalidateProfile(uid);
     
-    return NextResponse.json({ success: true, user });
+    return NextResponse.json({ success: true, user: toUserDTO(user.toObject()) });
   } catch (error) {
     console.error('Registration error:', error);
     return NextResponse.json({ error: 'Registration failed' }, { status: 500 });
@@ -72,7 +234,7 @@ async function handleLogin(request) {
   try {
     const { idToken } = await request.json();
     
-    const decodedToken = await auth.verifyIdToken(idToken);
+    const decodedToken = await span('auth', () => verifyIdToken(idToken));
     const { uid, email } = decodedToken;
     
     await dbConnect();
@@ -85,6 +247,7 @@ async function handleLogin(request) {
       },
       { upsert: true }
     );
+    invalidateProfile(uid);
     
     return NextResponse.json({ success: true });
   } catch (error) {
@@ -93,7 +256,7 @@ async function handleLogin(request) {
   }
 }
 
-// GET /api/leaves - Get user's leave requests
+// GET /api/leaves?status&type&cursor - Get user's leave requests
 async function handleGetLeaves(request) {
   const user = await getUserFromToken(request);
   if (!user) {
@@ -101,214 +264,652 @@ async function handleGetLeaves(request) {
   }
 
   await dbConnect();
-  const leaves = await LeaveRequest.find({ employeeUid: user.uid }).sort({ createdAt: -1 });
-  
-  return NextResponse.json(leaves);
+  const { search, searchParams } = new URL(request.url);
+  const filter = { employeeUid: user.uid };
+  const etag = versionTag('leaves', user.uid, search, await leaveScopeVersion(filter));
+
+  return conditionalJson(request, etag, async () => {
+    const page = await findLeavesPage(filter, searchParams);
+    return page || NextResponse.json({ error: 'Invalid cursor or filter' }, { status: 400 });
+  });
 }
 
 // POST /api/leaves - Create new leave request
 async function handleCreateLeave(request) {
-  const user = await getUserFromToken(request);
-  if (!user) {
+  const principal = await getPrincipal(request);
+  if (!principal) {
     return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
   }
+  const { user, profile } = principal;
 
   try {
-    const { type, startDate, endDate, reason, attachment } = await request.json();
+    const { type, startDate, endDate, reason, attachmentId } = await request.json();
     
-    // Calculate days between dates
-    const start = new Date(startDate);
-    const end = new Date(endDate);
-    const days = Math.ceil((end - start) / (1000 * 60 * 60 * 24)) + 1;
+    const validation = await span('validate', () => validateNewLeave(user.uid, { type, startDate, endDate }));
+    if (validation.error) {
+      const { status, ...body } = validation;
+      return NextResponse.json(body, { status });
+    }
+    const { start, end, days } = validation;
     
-    await dbConnect();
-    const userProfile = await User.findOne({ uid: user.uid });
+    // Attachments are uploaded beforehand through POST /api/attachments
+    let attachmentFile;
+    if (attachmentId) {
+      const file = await findAttachment(attachmentId);
+      if (!file || file.metadata?.ownerUid !== user.uid) {
+        return NextResponse.json({ error: 'Attachment not found' }, { status: 400 });
+      }
+      attachmentFile = {
+        fileId: file._id.toString(),
+        filename: file.filename,
+        contentType: file.metadata.contentType,
+        size: file.length,
+      };
+    }
     
     const leaveRequest = await LeaveRequest.create({
       id: uuidv4(),
       employeeUid: user.uid,
-      employeeName: userProfile.displayName,
+      employeeName: profile.displayName,
       employeeEmail: user.email,
+      department: profile.department,
       type,
       startDate: start,
       endDate: end,
       days,
       reason,
-      attachment,
+      attachmentFile,
       status: 'pending',
     });
+    await recordLeaveCreated(leaveRequest);
+    invalidateOrgStats();
     
-    return NextResponse.json(leaveRequest);
+    return NextResponse.json(toLeaveDTO(leaveRequest.toObject()));
   } catch (error) {
     console.error('Create leave error:', error);
     return NextResponse.json({ error: 'Failed to create leave request' }, { status: 500 });
   }
 }
 
-// GET /api/leaves/pending - Get pending leaves for approval (Manager/HR only)
+// GET /api/leaves/pending - Get pending leaves for approval, with the queue size on the first page (Manager/HR only)
 async function handleGetPendingLeaves(request) {
-  const user = await getUserFromToken(request);
-  if (!user) {
+  const principal = await getPrincipal(request);
+  if (!principal) {
     return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
   }
-
-  await dbConnect();
-  const userProfile = await User.findOne({ uid: user.uid });
   
-  if (!userProfile || !['Manager', 'HR'].includes(userProfile.role)) {
+  if (!isApprover(principal.profile)) {
     return NextResponse.json({ error: 'Insufficient permissions' }, { status: 403 });
   }
 
-  const pendingLeaves = await LeaveRequest.find({ status: 'pending' }).sort({ createdAt: -1 });
-  
-  return NextResponse.json(pendingLeaves);
+  // The queue is the same for every approver
+  const { search, searchParams } = new URL(request.url);
+  const filter = { status: 'pending' };
+  const etag = versionTag('pending', search, await leaveScopeVersion(filter));
+
+  return conditionalJson(request, etag, async () => {
+    const page = await findLeavesPage(filter, searchParams, { withTotal: true });
+    return page || NextResponse.json({ error: 'Invalid cursor or filter' }, { status: 400 });
+  });
+}
+
+// Comment line sent on idle event streams so proxies keep the connection open
+const STREAM_HEARTBEAT_MS = 25 * 1000;
+
+// GET /api/leaves/pending/stream - Server-sent events with changes to the approval queue (Manager/HR only)
+async function handleStreamPendingLeaves(request) {
+  const principal = await getPrincipal(request);
+  if (!principal) {
+    return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+  }
+
+  if (!isApprover(principal.profile)) {
+    return NextResponse.json({ error: 'Insufficient permissions' }, { status: 403 });
+  }
+
+  const encoder = new TextEncoder();
+  let cleanup = () => {};
+
+  const stream = new ReadableStream({
+    start(controller) {
+      const send = (text) => {
+        try {
+          controller.enqueue(encoder.encode(text));
+        } catch {
+          cleanup();
+        }
+      };
+
+      const unsubscribe = subscribePending(({ type, ...data }) => {
+        send(`event: ${type}\ndata: ${JSON.stringify(data)}\n\n`);
+      });
+      const heartbeat = setInterval(() => send(': ping\n\n'), STREAM_HEARTBEAT_MS);
+      cleanup = () => {
+        clearInterval(heartbeat);
+        unsubscribe();
+        cleanup = () => {};
+      };
+      request.signal?.addEventListener('abort', () => cleanup());
+
+      // Subscribed: the client can (re)load the queue without missing a change
+      send('retry: 5000\nevent: ready\ndata: {}\n\n');
+    },
+    cancel() {
+      cleanup();
+    },
+  });
+
+  return new Response(stream, {
+    headers: {
+      'Content-Type': 'text/event-stream; charset=utf-8',
+      'Cache-Control': 'no-cache, no-transform',
+      'Connection': 'keep-alive',
+      'X-Accel-Buffering': 'no',
+    },
+  });
+}
+
+// POST /api/attachments - Stream a raw file upload into the attachment store
+async function handleUploadAttachment(request) {
+  const principal = await getPrincipal(request);
+  if (!principal) {
+    return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+  }
+
+  if (parseInt(request.headers.get('content-length'), 10) > MAX_ATTACHMENT_BYTES) {
+    return NextResponse.json({ error: 'Attachment too large' }, { status: 413 });
+  }
+  if (!request.body) {
+    return NextResponse.json({ error: 'Empty upload' }, { status: 400 });
+  }
+
+  let filename = 'attachment';
+  try {
+    filename = decodeURIComponent(request.headers.get('x-filename') || filename);
+  } catch (error) {
+    // keep the default name for a malformed header
+  }
+
+  try {
+    const file = await saveAttachment(request.body, {
+      filename,
+      contentType: request.headers.get('content-type') || 'application/octet-stream',
+      ownerUid: principal.user.uid,
+    });
+    return NextResponse.json(file, { status: 201 });
+  } catch (error) {
+    if (error instanceof AttachmentTooLargeError) {
+      return NextResponse.json({ error: 'Attachment too large' }, { status: 413 });
+    }
+    console.error('Upload attachment error:', error);
+    return NextResponse.json({ error: 'Failed to store attachment' }, { status: 500 });
+  }
+}
+
+// Files are served only with an allowlisted type (see ATTACHMENT_TYPES), and
+// only those are offered inline; nosniff stops browsers guessing another one
+function attachmentHeaders(storedType, filename) {
+  const contentType = safeContentType(storedType);
+  const disposition = contentType === 'application/octet-stream' ? 'attachment' : 'inline';
+  return {
+    'Content-Type': contentType,
+    'Content-Disposition': `${disposition}; filename*=UTF-8''${encodeURIComponent(filename)}`,
+    'X-Content-Type-Options': 'nosniff',
+  };
+}
+
+// Attachments stored inline as a data URL by earlier versions of the app
+function legacyAttachmentResponse(leave) {
+  const match = /^data:([^;,]*)(;base64)?,(.*)$/s.exec(leave.attachment);
+  if (!match) {
+    return NextResponse.json({ error: 'Attachment not found' }, { status: 404 });
+  }
+  const body = match[2]
+    ? Buffer.from(match[3], 'base64')
+    : Buffer.from(decodeURIComponent(match[3]));
+
+  return new NextResponse(body, {
+    headers: {
+      ...attachmentHeaders(match[1], 'attachment'),
+      'Content-Length': String(body.length),
+    },
+  });
+}
+
+// GET /api/leaves/attachment?id= - Stream one leave's attachment (owner or Manager/HR)
+async function handleGetLeaveAttachment(request) {
+  const principal = await getPrincipal(request);
+  if (!principal) {
+    return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+  }
+
+  const leaveId = new URL(request.url).searchParams.get('id');
+  const leave = await LeaveRequest.findOne(
+    { id: leaveId },
+    'employeeUid attachment attachmentFile'
+  ).lean();
+  if (!leave || !(leave.attachmentFile?.fileId || leave.attachment)) {
+    return NextResponse.json({ error: 'Attachment not found' }, { status: 404 });
+  }
+  if (leave.employeeUid !== principal.user.uid && !isApprover(principal.profile)) {
+    return NextResponse.json({ error: 'Insufficient permissions' }, { status: 403 });
+  }
+
+  if (!leave.attachmentFile?.fileId) {
+    return legacyAttachmentResponse(leave);
+  }
+
+  const file = await findAttachment(leave.attachmentFile.fileId);
+  if (!file) {
+    return NextResponse.json({ error: 'Attachment not found' }, { status: 404 });
+  }
+
+  const etag = `"${file._id}"`;
+  const headers = {
+    ...attachmentHeaders(file.metadata?.contentType, file.filename),
+    'Accept-Ranges': 'bytes',
+    'Cache-Control': 'private, max-age=31536000, immutable',
+    ETag: etag,
+  };
+
+  if (etagMatches(request.headers.get('if-none-match'), etag)) {
+    return new NextResponse(null, { status: 304, headers });
+  }
+
+  // A stale If-Range means the client's partial copy is of another file: send it all
+  const ifRange = request.headers.get('if-range');
+  const range = !ifRange || ifRange === etag
+    ? parseRange(request.headers.get('range'), file.length)
+    : null;
+
+  if (range?.unsatisfiable) {
+    return new NextResponse(null, {
+      status: 416,
+      headers: { ...headers, 'Content-Range': `bytes */${file.length}` },
+    });
+  }
+
+  if (range) {
+    return new NextResponse(openAttachmentStream(file._id, range), {
+      status: 206,
+      headers: {
+        ...headers,
+        'Content-Range': `bytes ${range.start}-${range.end}/${file.length}`,
+        'Content-Length': String(range.end - range.start + 1),
+      },
+    });
+  }
+
+  return new NextResponse(openAttachmentStream(file._id), {
+    headers: { ...headers, 'Content-Length': String(file.length) },
+  });
 }
 
 // PUT /api/leaves/approve - Approve or reject leave request
 async function handleApproveLeave(request) {
-  const user = await getUserFromToken(request);
-  if (!user) {
+  const principal = await getPrincipal(request);
+  if (!principal) {
     return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
   }
 
   try {
     const { leaveId, action, rejectionReason } = await request.json();
     
-    await dbConnect();
-    const userProfile = await User.findOne({ uid: user.uid });
-    
-    if (!userProfile || !['Manager', 'HR'].includes(userProfile.role)) {
+    if (!isApprover(principal.profile)) {
       return NextResponse.json({ error: 'Insufficient permissions' }, { status: 403 });
     }
-
-    const updateData = {
-      status: action === 'approve' ? 'approved' : 'rejected',
-      approvedBy: user.uid,
-      approvedAt: new Date(),
-    };
-
-    if (action === 'reject' && rejectionReason) {
-      updateData.rejectionReason = rejectionReason;
+    if (typeof leaveId !== 'string' || !['approve', 'reject'].includes(action)) {
+      return NextResponse.json({ error: "leaveId and action ('approve' | 'reject') are required" }, { status: 400 });
     }
 
-    const updatedLeave = await LeaveRequest.findOneAndUpdate(
-      { id: leaveId },
-      updateData,
-      { new: true }
-    );
-
-    // If approved, deduct from user's leave balance
-    if (action === 'approve' && updatedLeave) {
-      const employee = await User.findOne({ uid: updatedLeave.employeeUid });
-      if (employee) {
-        const balanceField = `leaveBalance.${updatedLeave.type === 'annual' ? 'annual' : updatedLeave.type === 'sick' ? 'sick' : 'personal'}`;
-        await User.findOneAndUpdate(
-          { uid: updatedLeave.employeeUid },
-          { $inc: { [balanceField]: -updatedLeave.days } }
-        );
-      }
+    const { leave, applied } = await applyLeaveDecision(principal.user.uid, { leaveId, action, rejectionReason });
+    if (!leave) {
+      return NextResponse.json({ error: 'Leave request not found' }, { status: 404 });
+    }
+    // A retry of a decision that already went through gets the same answer
+    if (!applied && leave.status !== (action === 'approve' ? 'approved' : 'rejected')) {
+      return NextResponse.json(
+        { error: 'Leave request already processed', status: leave.status },
+        { status: 409 }
+      );
     }
 
-    return NextResponse.json(updatedLeave);
+    return NextResponse.json(toLeaveDTO(leave));
   } catch (error) {
     console.error('Approve leave error:', error);
     return NextResponse.json({ error: 'Failed to process leave request' }, { status: 500 });
   }
 }
 
+// PUT /api/leaves/approve/batch - Approve or reject many leave requests at once
+async function handleBatchApproveLeaves(request) {
+  const principal = await getPrincipal(request);
+  if (!principal) {
+    return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+  }
+
+  try {
+    const { items } = await request.json();
+    
+    if (!isApprover(principal.profile)) {
+      return NextResponse.json({ error: 'Insufficient permissions' }, { status: 403 });
+    }
+
+    const valid = Array.isArray(items)
+      && items.length > 0
+      && items.length <= MAX_BATCH_SIZE
+      && items.every((item) => typeof item?.leaveId === 'string' && ['approve', 'reject'].includes(item.action));
+    if (!valid) {
+      return NextResponse.json(
+        { error: `items must be 1-${MAX_BATCH_SIZE} { leaveId, action: 'approve' | 'reject' } entries` },
+        { status: 400 }
+      );
+    }
+
+    const results = await applyLeaveDecisions(principal.user.uid, items);
+    return jsonResponse({ results });
+  } catch (error) {
+    console.error('Batch approve error:', error);
+    return NextResponse.json({ error: 'Failed to process leave requests' }, { status: 500 });
+  }
+}
+
+const MAX_CALENDAR_DAYS = 93;
+const toDateString = (date) => date.toISOString().slice(0, 10);
+
+// GET /api/team/calendar?from=YYYY-MM-DD&to=YYYY-MM-DD&department= - Approved and
+// pending absences overlapping the window. Employees see their own department;
+// Manager/HR may pick any department, or 'all'.
+async function handleGetTeamCalendar(request) {
+  const principal = await getPrincipal(request);
+  if (!principal) {
+    return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+  }
+  const { user, profile } = principal;
+
+  const searchParams = new URL(request.url).searchParams;
+  const from = new Date(searchParams.get('from'));
+  const to = new Date(searchParams.get('to'));
+  if (Number.isNaN(from.getTime()) || Number.isNaN(to.getTime()) || to < from
+    || (to - from) / (1000 * 60 * 60 * 24) > MAX_CALENDAR_DAYS) {
+    return NextResponse.json(
+      { error: `from and to must be dates at most ${MAX_CALENDAR_DAYS} days apart` },
+      { status: 400 }
+    );
+  }
+
+  // Profiles without a department ('' or missing) see their own leaves only
+  const ownDepartment = profile?.department || null;
+  const department = searchParams.get('department') || ownDepartment;
+  if (department !== ownDepartment && !isApprover(profile)) {
+    return NextResponse.json({ error: 'Insufficient permissions' }, { status: 403 });
+  }
+
+  let scope = {};
+  if (department === null) {
+    scope = { employeeUid: user.uid };
+  } else if (department !== 'all') {
+    scope = { department };
+  }
+
+  const leaves = await LeaveRequest.find(
+    {
+      ...scope,
+      status: { $in: ['approved', 'pending'] },
+      endDate: { $gte: from },
+      startDate: { $lte: to },
+    },
+    'id employeeName department type startDate endDate status'
+  ).lean();
+
+  return jsonResponse({
+    from: toDateString(from),
+    to: toDateString(to),
+    department,
+    leaves: leaves.map((leave) => ({
+      id: leave.id,
+      employeeName: leave.employeeName,
+      department: leave.department,
+      type: leave.type,
+      startDate: toDateString(leave.startDate),
+      endDate: toDateString(leave.endDate),
+      status: leave.status,
+    })),
+  });
+}
+
 // GET /api/dashboard/stats - Get dashboard statistics
 async function handleGetDashboardStats(request) {
-  const user = await getUserFromToken(request);
-  if (!user) {
+  const principal = await getPrincipal(request);
+  if (!principal) {
     return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
   }
+  const { user, profile: userProfile } = principal;
 
-  await dbConnect();
-  const userProfile = await User.findOne({ uid: user.uid });
+  if (!userProfile) {
+    return NextResponse.json({ error: 'User not found' }, { status: 404 });
+  }
   
-  // Get user's recent leaves
-  const recentLeaves = await LeaveRequest.find({ employeeUid: user.uid })
-    .sort({ createdAt: -1 })
-    .limit(5);
-
-  // Get pending requests count
-  const pendingCount = await LeaveRequest.countDocuments({ 
-    employeeUid: user.uid, 
-    status: 'pending' 
+  // The profile comes from the principal cache. Org-wide manager stats are
+  // shared by all managers and cached briefly; their generation time versions them.
+  const [version, orgStats] = await Promise.all([
+    leaveScopeVersion({ employeeUid: user.uid }),
+    isApprover(userProfile) ? getOrgStats() : null,
+  ]);
+  const etag = versionTag(
+    'dashboard', user.uid, version, JSON.stringify(userProfile.leaveBalance), orgStats?.generatedAt || ''
+  );
+
+  return conditionalJson(request, etag, async () => {
+    const [recentLeaves, pendingCount] = await Promise.all([
+      LeaveRequest.find({ employeeUid: user.uid }, LEAVE_PROJECTION)
+        .sort({ createdAt: -1 })
+        .limit(5)
+        .lean(),
+      LeaveRequest.countDocuments({ employeeUid: user.uid, status: 'pending' }),
+    ]);
+
+    const stats = {
+      leaveBalance: userProfile.leaveBalance,
+      recentLeaves,
+      pendingCount,
+    };
+
+    if (orgStats) {
+      const { pendingApprovals, ...managerStats } = orgStats;
+      stats.pendingApprovals = pendingApprovals;
+      stats.managerStats = managerStats;
+    }
+
+    return stats;
   });
+}
 
-  const stats = {
-    leaveBalance: userProfile.leaveBalance,
-    recentLeaves,
-    pendingCount,
-  };
+// GET /api/leaves/summary?year=&employeeUid= - Days and requests per type and status for one year
+async function handleGetLeaveSummary(request) {
+  const principal = await getPrincipal(request);
+  if (!principal) {
+    return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+  }
+
+  const { searchParams } = new URL(request.url);
+  const year = parseInt(searchParams.get('year') || String(new Date().getUTCFullYear()), 10);
+  const employeeUid = searchParams.get('employeeUid') || principal.user.uid;
+  if (!Number.isInteger(year) || year < 1970 || year > 9999) {
+    return NextResponse.json({ error: 'year must be a calendar year' }, { status: 400 });
+  }
+  if (employeeUid !== principal.user.uid && !isApprover(principal.profile)) {
+    return NextResponse.json({ error: 'Insufficient permissions' }, { status: 403 });
+  }
+
+  const summary = await getLeaveSummary(employeeUid, year);
+  return NextResponse.json({ employeeUid, ...summary });
+}
+
+// POST /api/leaves/summary/rebuild - Recompute leave summaries from the leave requests (HR only)
+async function handleRebuildLeaveSummaries(request) {
+  const principal = await getPrincipal(request);
+  if (!principal) {
+    return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+  }
+  if (principal.profile?.role !== 'HR') {
+    return NextResponse.json({ error: 'Insufficient permissions' }, { status: 403 });
+  }
+
+  try {
+    const { employeeUid } = await request.json().catch(() => ({}));
+    const result = await rebuildLeaveSummaries({ employeeUid });
+    return NextResponse.json(result);
+  } catch (error) {
+    console.error('Rebuild leave summaries error:', error);
+    return NextResponse.json({ error: 'Failed to rebuild leave summaries' }, { status: 500 });
+  }
+}
+
+// GET /api/leaves/export?format=csv|ndjson&from&to&department&status&type - Stream leave requests (HR only)
+async function handleExportLeaves(request) {
+  const principal = await getPrincipal(request);
+  if (!principal) {
+    return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+  }
+  if (principal.profile?.role !== 'HR') {
+    return NextResponse.json({ error: 'Insufficient permissions' }, { status: 403 });
+  }
 
-  // Add manager stats if applicable
-  if (['Manager', 'HR'].includes(userProfile.role)) {
-    const pendingApprovals = await LeaveRequest.countDocuments({ status: 'pending' });
-    stats.pendingApprovals = pendingApprovals;
+  const { searchParams } = new URL(request.url);
+  const format = searchParams.get('format') || 'csv';
+  if (!EXPORT_FORMATS[format]) {
+    return NextResponse.json({ error: `format must be one of ${Object.keys(EXPORT_FORMATS).join(', ')}` }, { status: 400 });
   }
+  const { filter, error } = buildExportFilter(searchParams);
+  if (error) {
+    return NextResponse.json({ error }, { status: 400 });
+  }
+
+  return new Response(streamLeaveExport(filter, format), {
+    headers: {
+      'Content-Type': EXPORT_FORMATS[format],
+      'Content-Disposition': `attachment; filename="leaves-${toDateString(new Date())}.${format}"`,
+      'Cache-Control': 'no-store',
+    },
+  });
+}
+
+// Load tests and monitoring read metrics with the METRICS_TOKEN secret instead of a login
+function hasMetricsToken(request) {
+  const expected = process.env.METRICS_TOKEN;
+  const provided = request.headers.get('x-metrics-token');
+  if (!expected || !provided) {
+    return false;
+  }
+  const a = Buffer.from(provided);
+  const b = Buffer.from(expected);
+  return a.length === b.length && timingSafeEqual(a, b);
+}
 
-  return NextResponse.json(stats);
+// GET /api/metrics - In-process cache counters, Mongo pool counters and per-route stage timings (ms)
+// (Manager/HR, or X-Metrics-Token)
+async function handleGetMetrics(request) {
+  if (!hasMetricsToken(request)) {
+    const principal = await getPrincipal(request);
+    if (!principal) {
+      return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+    }
+    if (!isApprover(principal.profile)) {
+      return NextResponse.json({ error: 'Insufficient permissions' }, { status: 403 });
+    }
+  }
+
+  return NextResponse.json({
+    authTokenCache: getTokenCacheStats(),
+    profileCache: getProfileCacheStats(),
+    orgStatsCache: getOrgStatsCacheStats(),
+    mongoPool: getPoolStats(),
+    routes: getRouteTimings(),
+  });
 }
 
 export async function GET(request) {
   const url = new URL(request.url);
   const path = url.pathname.replace('/api', '');
 
-  try {
-    switch (path) {
-      case '/user':
-        return handleGetUser(request);
-      case '/leaves':
-        return handleGetLeaves(request);
-      case '/leaves/pending':
-        return handleGetPendingLeaves(request);
-      case '/dashboard/stats':
-        return handleGetDashboardStats(request);
-      default:
-        return NextResponse.json({ message: 'Breakly API - Ready!' });
+  return withTrace(`GET ${path || '/'}`, async () => {
+    try {
+      switch (path) {
+        case '/user':
+          return handleGetUser(request);
+        case '/leaves':
+          return handleGetLeaves(request);
+        case '/leaves/pending':
+          return handleGetPendingLeaves(request);
+        case '/leaves/pending/stream':
+          return handleStreamPendingLeaves(request);
+        case '/leaves/attachment':
+          return handleGetLeaveAttachment(request);
+        case '/leaves/summary':
+          return handleGetLeaveSummary(request);
+        case '/leaves/export':
+          return handleExportLeaves(request);
+        case '/dashboard/stats':
+          return handleGetDashboardStats(request);
+        case '/team/calendar':
+          return handleGetTeamCalendar(request);
+        case '/metrics':
+          return handleGetMetrics(request);
+        default:
+          return NextResponse.json({ message: 'Breakly API - Ready!' });
+      }
+    } catch (error) {
+      console.error('API Error:', error);
+      return NextResponse.json({ error: 'Internal server error' }, { status: 500 });
     }
-  } catch (error) {
-    console.error('API Error:', error);
-    return NextResponse.json({ error: 'Internal server error' }, { status: 500 });
-  }
+  });
 }
 
 export async function POST(request) {
   const url = new URL(request.url);
   const path = url.pathname.replace('/api', '');
 
-  try {
-    switch (path) {
-      case '/auth/register':
-        return handleRegister(request);
-      case '/auth/login':
-        return handleLogin(request);
-      case '/leaves':
-        return handleCreateLeave(request);
-      default:
-        return NextResponse.json({ error: 'Endpoint not found' }, { status: 404 });
+  return withTrace(`POST ${path || '/'}`, async () => {
+    try {
+      switch (path) {
+        case '/auth/register':
+          return handleRegister(request);
+        case '/auth/login':
+          return handleLogin(request);
+        case '/leaves':
+          return handleCreateLeave(request);
+        case '/attachments':
+          return handleUploadAttachment(request);
+        case '/leaves/summary/rebuild':
+          return handleRebuildLeaveSummaries(request);
+        default:
+          return NextResponse.json({ error: 'Endpoint not found' }, { status: 404 });
+      }
+    } catch (error) {
+      console.error('API Error:', error);
+      return NextResponse.json({ error: 'Internal server error' }, { status: 500 });
     }
-  } catch (error) {
-    console.error('API Error:', error);
-    return NextResponse.json({ error: 'Internal server error' }, { status: 500 });
-  }
+  });
 }
 
 export async function PUT(request) {
   const url = new URL(request.url);
   const path = url.pathname.replace('/api', '');
 
-  try {
-    switch (path) {
-      case '/leaves/approve':
-        return handleApproveLeave(request);
-      default:
-        return NextResponse.json({ error: 'Endpoint not found' }, { status: 404 });
+  return withTrace(`PUT ${path || '/'}`, async () => {
+    try {
+      switch (path) {
+        case '/leaves/approve':
+          return handleApproveLeave(request);
+        case '/leaves/approve/batch':
+          return handleBatchApproveLeaves(request);
+        default:
+          return NextResponse.json({ error: 'Endpoint not found' }, { status: 404 });
+      }
+    } catch (error) {
+      console.error('API Error:', error);
+      return NextResponse.json({ error: 'Internal server error' }, { status: 500 });
     }
-  } catch (error) {
-    console.error('API Error:', error);
-    return NextResponse.json({ error: 'Internal server error' }, { status: 500 });
-  }
+  });
 }
\ No newline at end of file
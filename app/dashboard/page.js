@@ -10,6 +10,7 @@ import { Badge } from '@/components/ui/badge';
 import { Progress } from '@/components/ui/progress';
 import { Calendar, Clock, CheckCircle, XCircle, Plus, Users } from 'lucide-react';
 import Link from 'next/link';
+import { fetchWithETag } from '@/lib/conditionalFetch';
 
 export default function DashboardPage() {
   const { getAuthToken } = useAuth();
@@ -25,7 +26,7 @@ export default function DashboardPage() {
       const token = await getAuthToken();
       const headers = token ? { 'Authorization': `Bearer ${token}` } : {};
       
-      const response = await fetch('/api/dashboard/stats', { headers });
+      const response = await fetchWithETag('/api/dashboard/stats', { headers });
       
       if (response.ok) {
         const data = await response.json();
@@ -189,6 +190,49 @@ export default function DashboardPage() {
             </Card>
           </div>
 
+          {/* Manager Overview */}
+          {stats?.managerStats && (
+            <Card className="mb-8">
+              <CardHeader>
+                <CardTitle className="text-xl flex items-center">
+                  <Users className="h-5 w-5 mr-2 text-blue-600" />
+                  Vue d'ensemble
+                </CardTitle>
+                <CardDescription>
+                  {stats.pendingApprovals} demande{stats.pendingApprovals > 1 ? 's' : ''} à valider dans l'entreprise
+                </CardDescription>
+              </CardHeader>
+              <CardContent className="grid grid-cols-1 md:grid-cols-3 gap-6 text-sm">
+                <div>
+                  <h4 className="font-medium mb-2">En attente par service</h4>
+                  {stats.managerStats.pendingByDepartment.map(({ department, count }) => (
+                    <div key={department || 'none'} className="flex justify-between text-gray-600">
+                      <span>{department || 'Sans service'}</span>
+                      <span className="font-semibold">{count}</span>
+                    </div>
+                  ))}
+                </div>
+                <div>
+                  <h4 className="font-medium mb-2">Jours pris en {stats.managerStats.year}</h4>
+                  {Object.entries(stats.managerStats.daysTakenByType).map(([type, days]) => (
+                    <div key={type} className="flex justify-between text-gray-600">
+                      <span>{getTypeLabel(type)}</span>
+                      <span className="font-semibold">{days} jours</span>
+                    </div>
+                  ))}
+                </div>
+                <div>
+                  <h4 className="font-medium mb-2">Délai de traitement</h4>
+                  <p className="text-gray-600">
+                    {stats.managerStats.approvalLatency.averageHours === null
+                      ? 'Aucune décision récente'
+                      : `${Math.round(stats.managerStats.approvalLatency.averageHours)} h en moyenne sur ${stats.managerStats.approvalLatency.decisions} décisions (${stats.managerStats.approvalLatency.windowDays} jours)`}
+                  </p>
+                </div>
+              </CardContent>
+            </Card>
+          )}
+
           {/* Recent Leaves */}
           <Card>
             <CardHeader>
@@ -1,6 +1,6 @@
 'use client';
 
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useAuth } from '@/contexts/AuthContext';
 import ProtectedRoute from '@/components/ProtectedRoute';
 import Layout from '@/components/Layout';
@@ -11,29 +11,76 @@ import { Input } from '@/components/ui/input';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@/components/ui/select';
 import { Calendar, Clock, CheckCircle, XCircle, Search, Filter, Download, ArrowLeft, FileText } from 'lucide-react';
 import Link from 'next/link';
+import { toast } from 'sonner';
+import { openLeaveAttachment } from '@/lib/leaveAttachments';
+import { fetchWithETag } from '@/lib/conditionalFetch';
 
 export default function LeaveHistoryPage() {
   const { getAuthToken } = useAuth();
   const [leaves, setLeaves] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [summary, setSummary] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [searchTerm, setSearchTerm] = useState('');
   const [statusFilter, setStatusFilter] = useState('all');
   const [typeFilter, setTypeFilter] = useState('all');
+  // Only the answer to the latest filters is shown
+  const latestQuery = useRef('');
 
   useEffect(() => {
-    loadLeaves();
+    loadSummary();
   }, []);
 
+  useEffect(() => {
+    loadLeaves();
+  }, [statusFilter, typeFilter]);
+
+  // Status and type are filtered by the server, across every page
+  const leavesUrl = (cursor) => {
+    const params = new URLSearchParams();
+    if (statusFilter !== 'all') {
+      params.set('status', statusFilter);
+    }
+    if (typeFilter !== 'all') {
+      params.set('type', typeFilter);
+    }
+    if (cursor) {
+      params.set('cursor', cursor);
+    }
+    const query = params.toString();
+    return query ? `/api/leaves?${query}` : '/api/leaves';
+  };
+
+  const loadSummary = async () => {
+    try {
+      const token = await getAuthToken();
+      const headers = token ? { 'Authorization': `Bearer ${token}` } : {};
+      const response = await fetch('/api/leaves/summary', { headers });
+      if (response.ok) {
+        setSummary(await response.json());
+      }
+    } catch (error) {
+      console.error('Error loading leave summary:', error);
+    }
+  };
+
   const loadLeaves = async () => {
+    const url = leavesUrl(null);
+    latestQuery.current = url;
     try {
       const token = await getAuthToken();
       const headers = token ? { 'Authorization': `Bearer ${token}` } : {};
       
-      const response = await fetch('/api/leaves', { headers });
+      const response = await fetchWithETag(url, { headers });
+      if (latestQuery.current !== url) {
+        return;
+      }
       
       if (response.ok) {
         const data = await response.json();
-        setLeaves(data);
+        setLeaves(data.items);
+        setNextCursor(data.nextCursor);
       } else {
         // Mock data si pas de token Firebase
         setLeaves([
@@ -67,6 +114,36 @@ export default function LeaveHistoryPage() {
     }
   };
 
+  const loadMoreLeaves = async () => {
+    setLoadingMore(true);
+    try {
+      const token = await getAuthToken();
+      const headers = token ? { 'Authorization': `Bearer ${token}` } : {};
+      
+      const firstPage = latestQuery.current;
+      const response = await fetch(leavesUrl(nextCursor), { headers });
+      
+      if (response.ok && latestQuery.current === firstPage) {
+        const data = await response.json();
+        setLeaves(prev => [...prev, ...data.items]);
+        setNextCursor(data.nextCursor);
+      }
+    } catch (error) {
+      console.error('Error loading more leaves:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const handleOpenAttachment = async (leaveId) => {
+    try {
+      await openLeaveAttachment(leaveId, await getAuthToken());
+    } catch (error) {
+      console.error('Error opening attachment:', error);
+      toast.error('Impossible d\'ouvrir la pièce jointe');
+    }
+  };
+
   const getStatusBadge = (status) => {
     switch (status) {
       case 'approved':
@@ -124,10 +201,30 @@ export default function LeaveHistoryPage() {
     return matchesSearch && matchesStatus && matchesType;
   });
 
-  const totalDays = filteredLeaves.reduce((sum, leave) => sum + leave.days, 0);
-  const approvedDays = filteredLeaves
-    .filter(leave => leave.status === 'approved')
-    .reduce((sum, leave) => sum + leave.days, 0);
+  // Year totals come from the server-side summary; the loaded page of
+  // requests is only a fallback (mock data)
+  const summaryCounts = (status) => {
+    const byType = typeFilter === 'all' ? Object.values(summary.types) : [summary.types[typeFilter] || {}];
+    return byType.reduce((totals, byStatus) => ({
+      requests: totals.requests + (byStatus[status]?.requests || 0),
+      days: totals.days + (byStatus[status]?.days || 0),
+    }), { requests: 0, days: 0 });
+  };
+  const statuses = statusFilter === 'all' ? ['pending', 'approved', 'rejected'] : [statusFilter];
+  const selected = summary && statuses.map(summaryCounts);
+
+  const totalDays = summary
+    ? selected.reduce((sum, counts) => sum + counts.days, 0)
+    : filteredLeaves.reduce((sum, leave) => sum + leave.days, 0);
+  const approvedDays = summary
+    ? (statuses.includes('approved') ? summaryCounts('approved').days : 0)
+    : filteredLeaves
+      .filter(leave => leave.status === 'approved')
+      .reduce((sum, leave) => sum + leave.days, 0);
+  const totalRequests = summary
+    ? selected.reduce((sum, counts) => sum + counts.requests, 0)
+    : filteredLeaves.length;
+  const periodLabel = summary ? ` en ${summary.year}` : '';
 
   if (loading) {
     return (
@@ -177,7 +274,7 @@ export default function LeaveHistoryPage() {
                     <Calendar className="h-6 w-6 text-blue-600" />
                   </div>
                   <div className="ml-4">
-                    <p className="text-sm font-medium text-gray-600">Total demandé</p>
+                    <p className="text-sm font-medium text-gray-600">Total demandé{periodLabel}</p>
                     <p className="text-2xl font-bold text-gray-900">{totalDays} jours</p>
                   </div>
                 </div>
@@ -191,7 +288,7 @@ export default function LeaveHistoryPage() {
                     <CheckCircle className="h-6 w-6 text-green-600" />
                   </div>
                   <div className="ml-4">
-                    <p className="text-sm font-medium text-gray-600">Jours approuvés</p>
+                    <p className="text-sm font-medium text-gray-600">Jours approuvés{periodLabel}</p>
                     <p className="text-2xl font-bold text-gray-900">{approvedDays} jours</p>
                   </div>
                 </div>
@@ -205,8 +302,8 @@ export default function LeaveHistoryPage() {
                     <Clock className="h-6 w-6 text-orange-600" />
                   </div>
                   <div className="ml-4">
-                    <p className="text-sm font-medium text-gray-600">Demandes totales</p>
-                    <p className="text-2xl font-bold text-gray-900">{filteredLeaves.length}</p>
+                    <p className="text-sm font-medium text-gray-600">Demandes totales{periodLabel}</p>
+                    <p className="text-2xl font-bold text-gray-900">{totalRequests}</p>
                   </div>
                 </div>
               </CardContent>
@@ -226,7 +323,8 @@ export default function LeaveHistoryPage() {
                 <div className="relative">
                   <Search className="absolute left-3 top-1/2 transform -translate-y-1/2 text-gray-400 h-4 w-4" />
                   <Input
-                    placeholder="Rechercher..."
+                    placeholder="Rechercher dans les demandes chargées..."
+                    title="La recherche porte sur les demandes déjà chargées"
                     value={searchTerm}
                     onChange={(e) => setSearchTerm(e.target.value)}
                     className="pl-10"
@@ -326,8 +424,8 @@ export default function LeaveHistoryPage() {
                         </div>
                         
                         <div className="flex items-center space-x-2 mt-4 lg:mt-0">
-                          {leave.attachment && (
-                            <Button variant="outline" size="sm">
+                          {leave.hasAttachment && (
+                            <Button variant="outline" size="sm" onClick={() => handleOpenAttachment(leave.id)}>
                               <FileText className="h-4 w-4 mr-2" />
                               Pièce jointe
                             </Button>
@@ -341,6 +439,13 @@ export default function LeaveHistoryPage() {
                       </div>
                     </div>
                   ))}
+                  {nextCursor && (
+                    <div className="text-center pt-2">
+                      <Button variant="outline" onClick={loadMoreLeaves} disabled={loadingMore}>
+                        {loadingMore ? 'Chargement...' : 'Charger plus'}
+                      </Button>
+                    </div>
+                  )}
                 </div>
               ) : (
                 <div className="text-center py-12">
@@ -15,6 +15,7 @@ import { Alert, AlertDescription } from '@/components/ui/alert';
 import { ArrowLeft, Upload, Calendar, Clock } from 'lucide-react';
 import Link from 'next/link';
 import { toast } from 'sonner';
+import { countWorkingDays } from '@/lib/workingDays';
 
 export default function NewLeavePage() {
   const { getAuthToken } = useAuth();
@@ -50,19 +51,15 @@ export default function NewLeavePage() {
         return;
       }
 
-      const reader = new FileReader();
-      reader.onload = (e) => {
-        setFormData(prev => ({ ...prev, attachment: e.target.result }));
-      };
-      reader.readAsDataURL(file);
+      // Le fichier est envoyé tel quel à la soumission, sans encodage base64
+      setFormData(prev => ({ ...prev, attachment: file }));
     }
   };
 
+  // Working days, counted exactly as the server will deduct them
   const calculateDays = () => {
     if (!formData.startDate || !formData.endDate) return 0;
-    const start = new Date(formData.startDate);
-    const end = new Date(formData.endDate);
-    return Math.ceil((end - start) / (1000 * 60 * 60 * 24)) + 1;
+    return countWorkingDays(new Date(formData.startDate), new Date(formData.endDate));
   };
 
   const validateForm = () => {
@@ -77,6 +74,7 @@ export default function NewLeavePage() {
     
     if (start < today) return 'La date de début ne peut pas être dans le passé';
     if (end < start) return 'La date de fin doit être après la date de début';
+    if (calculateDays() === 0) return 'La période sélectionnée ne contient aucun jour ouvré';
     
     return null;
   };
@@ -99,11 +97,30 @@ export default function NewLeavePage() {
         'Content-Type': 'application/json',
         ...(token && { 'Authorization': `Bearer ${token}` }),
       };
+      const { attachment, ...leave } = formData;
+      
+      if (attachment) {
+        const uploadResponse = await fetch('/api/attachments', {
+          method: 'POST',
+          headers: {
+            'Content-Type': attachment.type || 'application/octet-stream',
+            'X-Filename': encodeURIComponent(attachment.name),
+            ...(token && { 'Authorization': `Bearer ${token}` }),
+          },
+          body: attachment,
+        });
+        
+        if (!uploadResponse.ok) {
+          setError('Erreur lors de l\'envoi de la pièce jointe');
+          return;
+        }
+        leave.attachmentId = (await uploadResponse.json()).fileId;
+      }
       
       const response = await fetch('/api/leaves', {
         method: 'POST',
         headers,
-        body: JSON.stringify(formData),
+        body: JSON.stringify(leave),
       });
 
       if (response.ok) {
@@ -111,7 +128,13 @@ export default function NewLeavePage() {
         router.push('/dashboard');
       } else {
         const errorData = await response.json();
-        setError(errorData.error || 'Erreur lors de la création de la demande');
+        if (response.status === 409) {
+          setError('Cette période chevauche une demande déjà en attente ou approuvée');
+        } else if (errorData.available !== undefined) {
+          setError(`Solde insuffisant : ${errorData.available} jour${errorData.available > 1 ? 's' : ''} disponible${errorData.available > 1 ? 's' : ''}`);
+        } else {
+          setError(errorData.error || 'Erreur lors de la création de la demande');
+        }
       }
     } catch (error) {
       console.error('Error creating leave request:', error);
@@ -208,7 +231,7 @@ export default function NewLeavePage() {
                         <div className="flex items-center space-x-2">
                           <Calendar className="h-5 w-5 text-blue-600" />
                           <span className="font-medium text-blue-900">
-                            Durée : {days} jour{days > 1 ? 's' : ''}
+                            Durée : {days} jour{days > 1 ? 's' : ''} ouvré{days > 1 ? 's' : ''}
                           </span>
                         </div>
                       </div>
@@ -252,7 +275,7 @@ export default function NewLeavePage() {
                       </div>
                       {formData.attachment && (
                         <div className="text-sm text-green-600 bg-green-50 p-2 rounded">
-                          ✓ Fichier téléchargé avec succès
+                          ✓ {formData.attachment.name} sera joint à la demande
                         </div>
                       )}
                     </div>
@@ -1,6 +1,6 @@
 'use client';
 
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useAuth } from '@/contexts/AuthContext';
 import ProtectedRoute from '@/components/ProtectedRoute';
 import Layout from '@/components/Layout';
@@ -11,33 +11,93 @@ import { Textarea } from '@/components/ui/textarea';
 import { Alert, AlertDescription } from '@/components/ui/alert';
 import { Dialog, DialogContent, DialogDescription, DialogFooter, DialogHeader, DialogTitle, DialogTrigger } from '@/components/ui/dialog';
 import { Label } from '@/components/ui/label';
-import { ArrowLeft, Clock, CheckCircle, XCircle, Eye, FileText, Calendar, Users } from 'lucide-react';
+import { Checkbox } from '@/components/ui/checkbox';
+import { ArrowLeft, Clock, CheckCircle, XCircle, Eye, FileText, Calendar, Users, Download } from 'lucide-react';
 import Link from 'next/link';
 import { toast } from 'sonner';
+import { downloadFile } from '@/lib/downloadFile';
+import { openLeaveAttachment } from '@/lib/leaveAttachments';
+import { fetchWithETag } from '@/lib/conditionalFetch';
+import { subscribeEventStream } from '@/lib/eventStream';
 
 export default function ManagerPage() {
   const { getAuthToken } = useAuth();
   const [pendingLeaves, setPendingLeaves] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [processingId, setProcessingId] = useState(null);
+  const [selectedIds, setSelectedIds] = useState([]);
+  const [bulkProcessing, setBulkProcessing] = useState(false);
+  const [exporting, setExporting] = useState(false);
+  const [role, setRole] = useState(null);
+  // Taille de la file côté serveur : la liste n'en charge qu'une page
+  const [pendingTotal, setPendingTotal] = useState(null);
+  // Une décision est signalée par notre réponse et par le flux : un seul décompte
+  const leftQueue = useRef(new Set());
+  const joinedQueue = useRef(new Set());
   const [selectedLeave, setSelectedLeave] = useState(null);
   const [rejectionReason, setRejectionReason] = useState('');
   const [showRejectDialog, setShowRejectDialog] = useState(false);
 
   useEffect(() => {
     loadPendingLeaves();
+    loadRole();
+
+    // La file est ensuite tenue à jour par le flux du serveur
+    let connected = false;
+    return subscribeEventStream('/api/leaves/pending/stream', getAuthToken, (type, data) => {
+      if (type === 'ready') {
+        // Après une reconnexion, des changements ont pu être manqués
+        if (connected) {
+          loadPendingLeaves();
+        }
+        connected = true;
+      } else if (type === 'upsert') {
+        applyPendingUpsert(data.leave);
+      } else if (type === 'remove') {
+        removeFromQueue([data.id]);
+      }
+    });
   }, []);
 
+  const removeFromQueue = (ids) => {
+    const gone = ids.filter(id => !leftQueue.current.has(id));
+    gone.forEach(id => leftQueue.current.add(id));
+    setPendingTotal(prev => (prev === null ? prev : Math.max(prev - gone.length, 0)));
+    setPendingLeaves(prev => prev.filter(leave => !ids.includes(leave.id)));
+    setSelectedIds(prev => prev.filter(id => !ids.includes(id)));
+  };
+
+  // Newest first, like GET /api/leaves/pending
+  const applyPendingUpsert = (leave) => {
+    if (!joinedQueue.current.has(leave.id) && !leftQueue.current.has(leave.id)) {
+      joinedQueue.current.add(leave.id);
+      setPendingTotal(prev => (prev === null ? prev : prev + 1));
+    }
+    setPendingLeaves(prev => {
+      if (prev.some(item => item.id === leave.id)) {
+        return prev.map(item => (item.id === leave.id ? leave : item));
+      }
+      const index = prev.findIndex(item => new Date(item.createdAt) < new Date(leave.createdAt));
+      return index === -1 ? [...prev, leave] : [...prev.slice(0, index), leave, ...prev.slice(index)];
+    });
+  };
+
   const loadPendingLeaves = async () => {
     try {
       const token = await getAuthToken();
       const headers = token ? { 'Authorization': `Bearer ${token}` } : {};
       
-      const response = await fetch('/api/leaves/pending', { headers });
+      const response = await fetchWithETag('/api/leaves/pending', { headers });
       
       if (response.ok) {
         const data = await response.json();
-        setPendingLeaves(data);
+        leftQueue.current.clear();
+        joinedQueue.current.clear();
+        setPendingLeaves(data.items);
+        setPendingTotal(data.total ?? data.items.length);
+        setNextCursor(data.nextCursor);
       } else {
         // Mock data si pas de token Firebase
         setPendingLeaves([
@@ -64,7 +124,7 @@ export default function ManagerPage() {
             endDate: '2024-12-19',
             days: 2,
             reason: 'Grippe',
-            attachment: 'data:application/pdf;base64,mock-base64-data',
+            hasAttachment: true,
             status: 'pending',
             createdAt: '2024-12-15T14:30:00Z',
           },
@@ -91,6 +151,51 @@ export default function ManagerPage() {
     }
   };
 
+  // L'export est réservé aux RH
+  const loadRole = async () => {
+    try {
+      const token = await getAuthToken();
+      const headers = token ? { 'Authorization': `Bearer ${token}` } : {};
+
+      const response = await fetch('/api/user', { headers });
+      if (response.ok) {
+        const data = await response.json();
+        setRole(data.role);
+      }
+    } catch (error) {
+      console.error('Error loading user role:', error);
+    }
+  };
+
+  const loadMorePendingLeaves = async () => {
+    setLoadingMore(true);
+    try {
+      const token = await getAuthToken();
+      const headers = token ? { 'Authorization': `Bearer ${token}` } : {};
+      
+      const response = await fetch(`/api/leaves/pending?cursor=${encodeURIComponent(nextCursor)}`, { headers });
+      
+      if (response.ok) {
+        const data = await response.json();
+        setPendingLeaves(prev => [...prev, ...data.items]);
+        setNextCursor(data.nextCursor);
+      }
+    } catch (error) {
+      console.error('Error loading more pending leaves:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const handleOpenAttachment = async (leaveId) => {
+    try {
+      await openLeaveAttachment(leaveId, await getAuthToken());
+    } catch (error) {
+      console.error('Error opening attachment:', error);
+      toast.error('Impossible d\'ouvrir la pièce jointe');
+    }
+  };
+
   const handleApprove = async (leaveId) => {
     setProcessingId(leaveId);
     try {
@@ -111,7 +216,10 @@ export default function ManagerPage() {
 
       if (response.ok) {
         toast.success('Demande approuvée avec succès !');
-        setPendingLeaves(prev => prev.filter(leave => leave.id !== leaveId));
+        removeFromQueue([leaveId]);
+      } else if (response.status === 409) {
+        toast.info('Cette demande a déjà été traitée');
+        removeFromQueue([leaveId]);
       } else {
         throw new Error('Erreur lors de l\'approbation');
       }
@@ -123,6 +231,58 @@ export default function ManagerPage() {
     }
   };
 
+  const handleExport = async () => {
+    setExporting(true);
+    try {
+      await downloadFile('/api/leaves/export?format=csv', await getAuthToken(), 'conges.csv');
+    } catch (error) {
+      console.error('Error exporting leaves:', error);
+      toast.error(error.status === 403 ? 'Export réservé aux RH' : 'Erreur lors de l\'export des congés');
+    } finally {
+      setExporting(false);
+    }
+  };
+
+  const toggleSelected = (leaveId, checked) => {
+    setSelectedIds(prev => checked ? [...prev, leaveId] : prev.filter(id => id !== leaveId));
+  };
+
+  const handleBulkApprove = async () => {
+    setBulkProcessing(true);
+    try {
+      const token = await getAuthToken();
+      const headers = {
+        'Content-Type': 'application/json',
+        ...(token && { 'Authorization': `Bearer ${token}` }),
+      };
+      
+      const response = await fetch('/api/leaves/approve/batch', {
+        method: 'PUT',
+        headers,
+        body: JSON.stringify({
+          items: selectedIds.map(leaveId => ({ leaveId, action: 'approve' })),
+        }),
+      });
+
+      if (!response.ok) {
+        throw new Error('Erreur lors de l\'approbation groupée');
+      }
+
+      // Les demandes déjà traitées ailleurs quittent aussi la file
+      const { results } = await response.json();
+      const processed = results.filter(r => r.ok || r.status).map(r => r.leaveId);
+      const approved = results.filter(r => r.ok).length;
+      removeFromQueue(processed);
+      setSelectedIds([]);
+      toast.success(`${approved} demande${approved > 1 ? 's' : ''} approuvée${approved > 1 ? 's' : ''}`);
+    } catch (error) {
+      console.error('Error bulk approving leaves:', error);
+      toast.error('Erreur lors de l\'approbation groupée');
+    } finally {
+      setBulkProcessing(false);
+    }
+  };
+
   const handleReject = async () => {
     if (!selectedLeave || !rejectionReason.trim()) {
       toast.error('Veuillez fournir un motif de refus');
@@ -149,7 +309,13 @@ export default function ManagerPage() {
 
       if (response.ok) {
         toast.success('Demande refusée');
-        setPendingLeaves(prev => prev.filter(leave => leave.id !== selectedLeave.id));
+        removeFromQueue([selectedLeave.id]);
+        setShowRejectDialog(false);
+        setRejectionReason('');
+        setSelectedLeave(null);
+      } else if (response.status === 409) {
+        toast.info('Cette demande a déjà été traitée');
+        removeFromQueue([selectedLeave.id]);
         setShowRejectDialog(false);
         setRejectionReason('');
         setSelectedLeave(null);
@@ -204,6 +370,9 @@ export default function ManagerPage() {
     );
   }
 
+  // Sans réponse du serveur (données de démonstration), seule la liste est connue
+  const queueSize = pendingTotal ?? pendingLeaves.length;
+
   return (
     <ProtectedRoute>
       <Layout>
@@ -225,8 +394,14 @@ export default function ManagerPage() {
               <div className="flex items-center space-x-2 mt-4 sm:mt-0">
                 <Badge variant="secondary" className="text-sm">
                   <Clock className="h-4 w-4 mr-1" />
-                  {pendingLeaves.length} en attente
+                  {queueSize} en attente
                 </Badge>
+                {role === 'HR' && (
+                  <Button variant="outline" size="sm" onClick={handleExport} disabled={exporting}>
+                    <Download className="h-4 w-4 mr-2" />
+                    {exporting ? 'Export...' : 'Exporter (CSV)'}
+                  </Button>
+                )}
               </div>
             </div>
           </div>
@@ -241,7 +416,7 @@ export default function ManagerPage() {
                   </div>
                   <div className="ml-4">
                     <p className="text-sm font-medium text-gray-600">En attente</p>
-                    <p className="text-2xl font-bold text-gray-900">{pendingLeaves.length}</p>
+                    <p className="text-2xl font-bold text-gray-900">{queueSize}</p>
                   </div>
                 </div>
               </CardContent>
@@ -283,10 +458,24 @@ export default function ManagerPage() {
           {/* Pending Leaves */}
           <Card>
             <CardHeader>
-              <CardTitle>Demandes en attente</CardTitle>
-              <CardDescription>
-                Examinez et traitez les demandes de congés de votre équipe
-              </CardDescription>
+              <div className="flex flex-col sm:flex-row justify-between items-start sm:items-center">
+                <div>
+                  <CardTitle>Demandes en attente</CardTitle>
+                  <CardDescription>
+                    Examinez et traitez les demandes de congés de votre équipe
+                  </CardDescription>
+                </div>
+                {selectedIds.length > 0 && (
+                  <Button
+                    onClick={handleBulkApprove}
+                    disabled={bulkProcessing}
+                    className="mt-4 sm:mt-0 bg-green-600 hover:bg-green-700"
+                  >
+                    <CheckCircle className="h-4 w-4 mr-2" />
+                    {bulkProcessing ? 'Approbation...' : `Approuver la sélection (${selectedIds.length})`}
+                  </Button>
+                )}
+              </div>
             </CardHeader>
             <CardContent>
               {pendingLeaves.length > 0 ? (
@@ -300,6 +489,11 @@ export default function ManagerPage() {
                         <div className="flex-1">
                           {/* Employee Info */}
                           <div className="flex items-center space-x-3 mb-4">
+                            <Checkbox
+                              checked={selectedIds.includes(leave.id)}
+                              onCheckedChange={(checked) => toggleSelected(leave.id, checked === true)}
+                              aria-label={`Sélectionner la demande de ${leave.employeeName}`}
+                            />
                             <div className="w-10 h-10 bg-blue-600 rounded-full flex items-center justify-center">
                               <span className="text-white font-semibold">
                                 {leave.employeeName.charAt(0)}
@@ -351,9 +545,9 @@ export default function ManagerPage() {
                           )}
 
                           {/* Attachment */}
-                          {leave.attachment && (
+                          {leave.hasAttachment && (
                             <div className="mb-4">
-                              <Button variant="outline" size="sm">
+                              <Button variant="outline" size="sm" onClick={() => handleOpenAttachment(leave.id)}>
                                 <FileText className="h-4 w-4 mr-2" />
                                 Voir la pièce jointe
                               </Button>
@@ -431,6 +625,13 @@ export default function ManagerPage() {
                       </div>
                     </div>
                   ))}
+                  {nextCursor && (
+                    <div className="text-center">
+                      <Button variant="outline" onClick={loadMorePendingLeaves} disabled={loadingMore}>
+                        {loadingMore ? 'Chargement...' : 'Charger plus'}
+                      </Button>
+                    </div>
+                  )}
                 </div>
               ) : (
                 <div className="text-center py-12">
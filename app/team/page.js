@@ -20,40 +20,63 @@ export default function TeamPage() {
 
   useEffect(() => {
     loadTeamLeaves();
-  }, [currentDate]);
+  }, [currentDate, viewMode]);
+
+  const toDateParam = (date) => {
+    const month = String(date.getMonth() + 1).padStart(2, '0');
+    const day = String(date.getDate()).padStart(2, '0');
+    return `${date.getFullYear()}-${month}-${day}`;
+  };
 
   const loadTeamLeaves = async () => {
     try {
-      // Simuler les données d'équipe puisque nous n'avons pas encore l'API team
-      setTeamLeaves([
-        {
-          id: '1',
-          employeeName: 'Marie Dubois',
-          department: 'Marketing',
-          type: 'annual',
-          startDate: '2024-12-20',
-          endDate: '2024-12-24',
-          status: 'approved',
-        },
-        {
-          id: '2',
-          employeeName: 'Pierre Martin',
-          department: 'Engineering',
-          type: 'sick',
-          startDate: '2024-12-18',
-          endDate: '2024-12-19',
-          status: 'approved',
-        },
-        {
-          id: '3',
-          employeeName: 'Sophie Bernard',
-          department: 'Sales',
-          type: 'personal',
-          startDate: '2024-12-23',
-          endDate: '2024-12-23',
-          status: 'pending',
-        },
-      ]);
+      const token = await getAuthToken();
+      const headers = token ? { 'Authorization': `Bearer ${token}` } : {};
+      
+      // Seule la fenêtre affichée est demandée au serveur
+      const days = viewMode === 'week' ? getWeekDays() : getMonthCalendar();
+      const params = new URLSearchParams({
+        from: toDateParam(days[0]),
+        to: toDateParam(days[days.length - 1]),
+      });
+      
+      const response = await fetch(`/api/team/calendar?${params}`, { headers });
+      
+      if (response.ok) {
+        const data = await response.json();
+        setTeamLeaves(data.leaves);
+      } else {
+        // Mock data si pas de token Firebase
+        setTeamLeaves([
+          {
+            id: '1',
+            employeeName: 'Marie Dubois',
+            department: 'Marketing',
+            type: 'annual',
+            startDate: '2024-12-20',
+            endDate: '2024-12-24',
+            status: 'approved',
+          },
+          {
+            id: '2',
+            employeeName: 'Pierre Martin',
+            department: 'Engineering',
+            type: 'sick',
+            startDate: '2024-12-18',
+            endDate: '2024-12-19',
+            status: 'approved',
+          },
+          {
+            id: '3',
+            employeeName: 'Sophie Bernard',
+            department: 'Sales',
+            type: 'personal',
+            startDate: '2024-12-23',
+            endDate: '2024-12-23',
+            status: 'pending',
+          },
+        ]);
+      }
     } catch (error) {
       console.error('Error loading team leaves:', error);
       setTeamLeaves([]);
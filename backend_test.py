@@ -4,10 +4,13 @@ Comprehensive Backend API Testing for Breakly Application
 Tests all endpoints including authentication, leave management, and database connectivity
 """
 
+import argparse
 import requests
 import json
 import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import uuid
 
@@ -16,13 +19,18 @@ BASE_URL = os.getenv('NEXT_PUBLIC_BASE_URL', 'https://6a289a88-b30b-4ff8-85d3-c2
 API_BASE = f"{BASE_URL}/api"
 
 class BreaklyAPITester:
-    def __init__(self):
+    def __init__(self, parallel=False, concurrency=8):
         self.session = requests.Session()
         self.test_results = []
         self.auth_token = None
+        self.parallel = parallel
+        self.concurrency = concurrency
+        self._local = threading.local()
+        self._in_flight = threading.BoundedSemaphore(concurrency)
+        self._probe_pool = None
         
     def log_result(self, test_name, success, message, details=None):
-        """Log test result"""
+        """Log test result (buffered per check in parallel mode to keep output order)"""
         result = {
             'test': test_name,
             'success': success,
@@ -30,16 +38,51 @@ class BreaklyAPITester:
             'details': details,
             'timestamp': datetime.now().isoformat()
         }
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is not None:
+            buffer.append(result)
+        else:
+            self._emit(result)
+    
+    def _emit(self, result):
         self.test_results.append(result)
-        status = "✅ PASS" if success else "❌ FAIL"
-        print(f"{status}: {test_name} - {message}")
-        if details:
-            print(f"   Details: {details}")
+        status = "✅ PASS" if result['success'] else "❌ FAIL"
+        print(f"{status}: {result['test']} - {result['message']}")
+        if result['details']:
+            print(f"   Details: {result['details']}")
+    
+    def _request(self, method, url, **kwargs):
+        """Send a request; in parallel mode use a per-thread session and cap in-flight requests"""
+        if not self.parallel:
+            return self.session.request(method, url, **kwargs)
+        
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        with self._in_flight:
+            return session.request(method, url, **kwargs)
+    
+    def _probe_all(self, probe, items):
+        """Run probe(item) for every item, concurrently in parallel mode; results keep item order"""
+        def safe_probe(item):
+            try:
+                return probe(item)
+            except Exception as e:
+                return e
+        
+        if self._probe_pool is None:
+            return [safe_probe(item) for item in items]
+        return list(self._probe_pool.map(safe_probe, items))
+    
+    def _send(self, method, endpoint):
+        if method == "GET":
+            return self._request("GET", f"{API_BASE}{endpoint}")
+        return self._request(method, f"{API_BASE}{endpoint}", json={})
     
     def test_api_health_check(self):
         """Test GET /api - Basic health check"""
         try:
-            response = self.session.get(f"{API_BASE}")
+            response = self._request("GET", f"{API_BASE}")
             
             if response.status_code == 200:
                 data = response.json()
@@ -67,7 +110,7 @@ class BreaklyAPITester:
                 # Missing idToken intentionally
             }
             
-            response = self.session.post(f"{API_BASE}/auth/register", json=test_data)
+            response = self._request("POST", f"{API_BASE}/auth/register", json=test_data)
             
             # Should fail due to missing Firebase token
             if response.status_code >= 400:
@@ -88,7 +131,7 @@ class BreaklyAPITester:
         try:
             test_data = {}  # Missing idToken
             
-            response = self.session.post(f"{API_BASE}/auth/login", json=test_data)
+            response = self._request("POST", f"{API_BASE}/auth/login", json=test_data)
             
             # Should fail due to missing Firebase token
             if response.status_code >= 400:
@@ -110,32 +153,29 @@ class BreaklyAPITester:
             ("GET", "/user", "Get User Profile"),
             ("GET", "/leaves", "Get User Leaves"),
             ("GET", "/leaves/pending", "Get Pending Leaves"),
+            ("GET", "/leaves/pending/stream", "Stream Pending Leaves"),
             ("GET", "/dashboard/stats", "Get Dashboard Stats"),
+            ("GET", "/leaves/summary", "Get Leave Summary"),
+            ("GET", "/leaves/export", "Export Leaves"),
+            ("GET", "/metrics", "Server Metrics"),
+            ("POST", "/leaves/summary/rebuild", "Rebuild Leave Summaries"),
             ("POST", "/leaves", "Create Leave Request"),
             ("PUT", "/leaves/approve", "Approve Leave Request")
         ]
         
         all_passed = True
+        responses = self._probe_all(lambda item: self._send(item[0], item[1]), protected_endpoints)
         
-        for method, endpoint, description in protected_endpoints:
-            try:
-                if method == "GET":
-                    response = self.session.get(f"{API_BASE}{endpoint}")
-                elif method == "POST":
-                    response = self.session.post(f"{API_BASE}{endpoint}", json={})
-                elif method == "PUT":
-                    response = self.session.put(f"{API_BASE}{endpoint}", json={})
-                
-                if response.status_code == 401:
-                    self.log_result(f"Protected Endpoint - {description}", True, 
-                                  "Correctly requires authentication", f"Status: {response.status_code}")
-                else:
-                    self.log_result(f"Protected Endpoint - {description}", False, 
-                                  "Should require authentication", f"Status: {response.status_code}")
-                    all_passed = False
-                    
-            except Exception as e:
-                self.log_result(f"Protected Endpoint - {description}", False, f"Request error: {str(e)}")
+        for (method, endpoint, description), response in zip(protected_endpoints, responses):
+            if isinstance(response, Exception):
+                self.log_result(f"Protected Endpoint - {description}", False, f"Request error: {str(response)}")
+                all_passed = False
+            elif response.status_code == 401:
+                self.log_result(f"Protected Endpoint - {description}", True, 
+                              "Correctly requires authentication", f"Status: {response.status_code}")
+            else:
+                self.log_result(f"Protected Endpoint - {description}", False, 
+                              "Should require authentication", f"Status: {response.status_code}")
                 all_passed = False
         
         return all_passed
@@ -150,7 +190,7 @@ class BreaklyAPITester:
                 "reason": "Test leave request"
             }
             
-            response = self.session.post(f"{API_BASE}/leaves", json=invalid_data)
+            response = self._request("POST", f"{API_BASE}/leaves", json=invalid_data)
             
             # Should fail due to no authentication (401) rather than validation (400)
             if response.status_code == 401:
@@ -170,7 +210,7 @@ class BreaklyAPITester:
         """Test database connectivity through API endpoints"""
         try:
             # Try to hit an endpoint that would connect to database
-            response = self.session.get(f"{API_BASE}/user")
+            response = self._request("GET", f"{API_BASE}/user")
             
             # We expect 401 (unauthorized) rather than 500 (database error)
             if response.status_code == 401:
@@ -213,24 +253,21 @@ class BreaklyAPITester:
         ]
         
         all_routed = True
+        responses = self._probe_all(lambda item: self._send("GET", item[0]), endpoints_to_test)
         
-        for endpoint, description in endpoints_to_test:
-            try:
-                response = self.session.get(f"{API_BASE}{endpoint}")
-                
-                # 404 means endpoint not found/routed
-                if response.status_code == 404:
-                    self.log_result(f"Endpoint Routing - {description}", False, 
-                                  "Endpoint not found", f"URL: {API_BASE}{endpoint}")
-                    all_routed = False
-                else:
-                    # Any other status means the endpoint exists and is routed
-                    self.log_result(f"Endpoint Routing - {description}", True, 
-                                  "Endpoint properly routed", f"Status: {response.status_code}")
-                    
-            except Exception as e:
-                self.log_result(f"Endpoint Routing - {description}", False, f"Request error: {str(e)}")
+        for (endpoint, description), response in zip(endpoints_to_test, responses):
+            if isinstance(response, Exception):
+                self.log_result(f"Endpoint Routing - {description}", False, f"Request error: {str(response)}")
+                all_routed = False
+            # 404 means endpoint not found/routed
+            elif response.status_code == 404:
+                self.log_result(f"Endpoint Routing - {description}", False, 
+                              "Endpoint not found", f"URL: {API_BASE}{endpoint}")
                 all_routed = False
+            else:
+                # Any other status means the endpoint exists and is routed
+                self.log_result(f"Endpoint Routing - {description}", True, 
+                              "Endpoint properly routed", f"Status: {response.status_code}")
         
         return all_routed
     
@@ -247,36 +284,28 @@ class BreaklyAPITester:
         ]
         
         all_passed = True
+        responses = self._probe_all(lambda item: self._send(item[0], item[1]), method_tests)
         
-        for method, endpoint, description in method_tests:
-            try:
-                if method == "GET":
-                    response = self.session.get(f"{API_BASE}{endpoint}")
-                elif method == "POST":
-                    response = self.session.post(f"{API_BASE}{endpoint}", json={})
-                elif method == "PUT":
-                    response = self.session.put(f"{API_BASE}{endpoint}", json={})
-                
-                # 405 means method not allowed, which is bad
-                if response.status_code == 405:
-                    self.log_result(f"HTTP Method - {description}", False, 
-                                  "Method not allowed", f"Method: {method}")
-                    all_passed = False
-                else:
-                    # Any other status means the method is accepted
-                    self.log_result(f"HTTP Method - {description}", True, 
-                                  "Method accepted", f"Status: {response.status_code}")
-                    
-            except Exception as e:
-                self.log_result(f"HTTP Method - {description}", False, f"Request error: {str(e)}")
+        for (method, endpoint, description), response in zip(method_tests, responses):
+            if isinstance(response, Exception):
+                self.log_result(f"HTTP Method - {description}", False, f"Request error: {str(response)}")
+                all_passed = False
+            # 405 means method not allowed, which is bad
+            elif response.status_code == 405:
+                self.log_result(f"HTTP Method - {description}", False, 
+                              "Method not allowed", f"Method: {method}")
                 all_passed = False
+            else:
+                # Any other status means the method is accepted
+                self.log_result(f"HTTP Method - {description}", True, 
+                              "Method accepted", f"Status: {response.status_code}")
         
         return all_passed
     
     def test_cors_and_headers(self):
         """Test CORS and response headers"""
         try:
-            response = self.session.get(f"{API_BASE}")
+            response = self._request("GET", f"{API_BASE}")
             
             # Check if response has proper headers
             content_type = response.headers.get('content-type', '')
@@ -294,11 +323,45 @@ class BreaklyAPITester:
             self.log_result("Response Headers", False, f"Request error: {str(e)}")
             return False
     
+    def test_server_timing(self):
+        """Test Server-Timing header and the per-route timings in GET /api/metrics"""
+        try:
+            response = self._request("GET", f"{API_BASE}")
+            timing = response.headers.get('Server-Timing', '')
+            if 'total;dur=' not in timing:
+                self.log_result("Server Timing", False,
+                              "Missing Server-Timing header", f"Server-Timing: {timing!r}")
+                return False
+            
+            metrics_token = os.getenv('METRICS_TOKEN')
+            if not metrics_token:
+                self.log_result("Server Timing", True,
+                              "Server-Timing header present", "METRICS_TOKEN unset, /metrics not read")
+                return True
+            response = self._request("GET", f"{API_BASE}/metrics", headers={'X-Metrics-Token': metrics_token})
+            if response.status_code != 200:
+                self.log_result("Server Timing", False, f"Metrics HTTP {response.status_code}", response.text)
+                return False
+            
+            routes = response.json().get('routes', {})
+            health = routes.get('GET /')
+            if health and health['count'] > 0 and health['p95'] >= 0:
+                self.log_result("Server Timing", True,
+                              "Stage timings exposed", f"{len(routes)} routes, GET / p95 {health['p95']}ms")
+                return True
+            else:
+                self.log_result("Server Timing", False, "Health route missing from metrics", routes)
+                return False
+                
+        except Exception as e:
+            self.log_result("Server Timing", False, f"Request error: {str(e)}")
+            return False
+    
     def test_error_handling(self):
         """Test error handling for invalid requests"""
         try:
             # Test invalid JSON
-            response = self.session.post(f"{API_BASE}/auth/login", 
+            response = self._request("POST", f"{API_BASE}/auth/login", 
                                        data="invalid json", 
                                        headers={'Content-Type': 'application/json'})
             
@@ -315,10 +378,45 @@ class BreaklyAPITester:
             self.log_result("Error Handling", False, f"Request error: {str(e)}")
             return False
     
+    def _run_buffered(self, test):
+        """Run one check on a worker thread, capturing its log entries instead of printing"""
+        self._local.buffer = []
+        try:
+            return test(), self._local.buffer, None
+        except Exception as e:
+            return False, self._local.buffer, e
+        finally:
+            self._local.buffer = None
+    
+    def _run_checks(self, tests):
+        """Yield (test, passed, error) in declaration order, printing each check's log as it is reached"""
+        if not self.parallel:
+            for test in tests:
+                try:
+                    yield test, test(), None
+                except Exception as e:
+                    yield test, False, e
+            return
+        
+        with ThreadPoolExecutor(max_workers=self.concurrency) as check_pool, \
+                ThreadPoolExecutor(max_workers=self.concurrency) as probe_pool:
+            self._probe_pool = probe_pool
+            try:
+                futures = [check_pool.submit(self._run_buffered, test) for test in tests]
+                for test, future in zip(tests, futures):
+                    passed, buffer, error = future.result()
+                    for result in buffer:
+                        self._emit(result)
+                    yield test, passed, error
+            finally:
+                self._probe_pool = None
+    
     def run_all_tests(self):
         """Run all backend tests"""
         print("🚀 Starting Breakly Backend API Tests")
         print(f"📍 Testing API at: {API_BASE}")
+        if self.parallel:
+            print(f"⚡ Parallel mode: up to {self.concurrency} requests in flight")
         print("=" * 60)
         
         # Run all tests
@@ -328,6 +426,7 @@ class BreaklyAPITester:
             self.test_endpoint_routing,
             self.test_http_methods,
             self.test_cors_and_headers,
+            self.test_server_timing,
             self.test_auth_register_without_token,
             self.test_auth_login_without_token,
             self.test_protected_endpoints_without_auth,
@@ -338,12 +437,11 @@ class BreaklyAPITester:
         passed = 0
         total = len(tests)
         
-        for test in tests:
-            try:
-                if test():
-                    passed += 1
-            except Exception as e:
-                print(f"❌ Test {test.__name__} failed with exception: {str(e)}")
+        for test, test_passed, error in self._run_checks(tests):
+            if error is not None:
+                print(f"❌ Test {test.__name__} failed with exception: {str(error)}")
+            elif test_passed:
+                passed += 1
         
         print("\n" + "=" * 60)
         print(f"📊 Test Results: {passed}/{total} tests passed")
@@ -369,7 +467,14 @@ class BreaklyAPITester:
         return passed == total
 
 if __name__ == "__main__":
-    tester = BreaklyAPITester()
+    parser = argparse.ArgumentParser(description="Breakly backend API tests")
+    parser.add_argument('--parallel', action='store_true',
+                        help="Fan out independent checks and per-endpoint probes")
+    parser.add_argument('--concurrency', type=int, default=int(os.getenv('TEST_CONCURRENCY', '8')),
+                        help="Maximum requests in flight in parallel mode")
+    args = parser.parse_args()
+    
+    tester = BreaklyAPITester(parallel=args.parallel, concurrency=args.concurrency)
     success = tester.run_all_tests()
     
     if success:
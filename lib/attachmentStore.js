@@ -0,0 +1,105 @@
+import mongoose from 'mongoose';
+import { Readable, Transform } from 'stream';
+import { pipeline } from 'stream/promises';
+
+// Leave attachments live in a GridFS bucket next to the app data, so a
+// LeaveRequest only carries a small reference. Stored files are immutable:
+// the file id doubles as a strong ETag.
+const BUCKET_NAME = 'attachments';
+export const MAX_ATTACHMENT_BYTES = 5 * 1024 * 1024;
+
+// What the new-leave form accepts. Any other declared type is stored and
+// served as an opaque download, never as something a browser would render.
+export const ATTACHMENT_TYPES = [
+  'application/pdf',
+  'application/msword',
+  'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+  'image/jpeg',
+  'image/png',
+];
+
+export class AttachmentTooLargeError extends Error {}
+
+export function safeContentType(contentType) {
+  const type = String(contentType || '').split(';')[0].trim().toLowerCase();
+  return ATTACHMENT_TYPES.includes(type) ? type : 'application/octet-stream';
+}
+
+// Callers must have awaited dbConnect() first.
+function getBucket() {
+  return new mongoose.mongo.GridFSBucket(mongoose.connection.db, { bucketName: BUCKET_NAME });
+}
+
+function toObjectId(fileId) {
+  return mongoose.isValidObjectId(fileId) ? new mongoose.Types.ObjectId(String(fileId)) : null;
+}
+
+// Stream a request body (web ReadableStream) into GridFS chunk by chunk,
+// enforcing the size limit without ever holding the whole file in memory.
+export async function saveAttachment(body, { filename, contentType: declaredType, ownerUid }) {
+  const contentType = safeContentType(declaredType);
+  let size = 0;
+  const limiter = new Transform({
+    transform(chunk, encoding, callback) {
+      size += chunk.length;
+      if (size > MAX_ATTACHMENT_BYTES) {
+        callback(new AttachmentTooLargeError(`Attachment exceeds ${MAX_ATTACHMENT_BYTES} bytes`));
+        return;
+      }
+      callback(null, chunk);
+    },
+  });
+
+  const upload = getBucket().openUploadStream(filename, {
+    metadata: { ownerUid, contentType },
+  });
+
+  try {
+    await pipeline(Readable.fromWeb(body), limiter, upload);
+  } catch (error) {
+    await upload.abort().catch(() => {});
+    throw error;
+  }
+
+  return { fileId: upload.id.toString(), filename, contentType, size };
+}
+
+export async function findAttachment(fileId) {
+  const id = toObjectId(fileId);
+  if (!id) {
+    return null;
+  }
+  const [file] = await getBucket().find({ _id: id }).limit(1).toArray();
+  return file || null;
+}
+
+// Stream bytes [start, end] (inclusive) of a stored file as a web ReadableStream
+export function openAttachmentStream(fileId, { start, end } = {}) {
+  const options = start === undefined ? {} : { start, end: end + 1 };
+  return Readable.toWeb(getBucket().openDownloadStream(toObjectId(fileId), options));
+}
+
+// Parse a single "bytes=" range against a file size. Returns null when the
+// header is absent or not a single byte range (serve the whole file), and
+// { unsatisfiable: true } when it falls outside the file.
+export function parseRange(header, size) {
+  const match = /^bytes=(\d*)-(\d*)$/.exec((header || '').trim());
+  if (!match || (match[1] === '' && match[2] === '')) {
+    return null;
+  }
+
+  let start;
+  let end;
+  if (match[1] === '') {
+    start = Math.max(size - parseInt(match[2], 10), 0);
+    end = size - 1;
+  } else {
+    start = parseInt(match[1], 10);
+    end = match[2] === '' ? size - 1 : Math.min(parseInt(match[2], 10), size - 1);
+  }
+
+  if (start >= size || start > end) {
+    return { unsatisfiable: true };
+  }
+  return { start, end };
+}
@@ -0,0 +1,37 @@
+// fetch() for JSON read endpoints that answer with an ETag. The last body seen
+// for each URL (and caller) is kept in memory and revalidated with
+// If-None-Match; a 304 is turned back into a 200 carrying the cached body, so
+// pages handle the response exactly as before.
+const MAX_ENTRIES = 20;
+const entries = new Map();
+
+export async function fetchWithETag(url, options = {}) {
+  const headers = { ...options.headers };
+  const key = `${headers.Authorization || ''} ${url}`;
+  const cached = entries.get(key);
+  if (cached) {
+    headers['If-None-Match'] = cached.etag;
+  }
+
+  // Bypass the browser cache: the revalidation is done here
+  const response = await fetch(url, { ...options, headers, cache: 'no-store' });
+
+  if (response.status === 304 && cached) {
+    entries.delete(key);
+    entries.set(key, cached);
+    return new Response(cached.body, {
+      status: 200,
+      headers: { 'Content-Type': 'application/json', ETag: cached.etag },
+    });
+  }
+
+  entries.delete(key);
+  const etag = response.headers.get('ETag');
+  if (response.ok && etag) {
+    entries.set(key, { etag, body: await response.clone().text() });
+    while (entries.size > MAX_ENTRIES) {
+      entries.delete(entries.keys().next().value);
+    }
+  }
+  return response;
+}
@@ -1,4 +1,8 @@
 import mongoose from 'mongoose';
+import User from '@/models/User';
+import LeaveRequest from '@/models/LeaveRequest';
+import LeaveSummary from '@/models/LeaveSummary';
+import { span } from '@/lib/tracing';
 
 const MONGODB_URI = process.env.MONGO_URL;
 const DB_NAME = process.env.DB_NAME || 'breakly_db';
@@ -7,10 +11,72 @@ if (!MONGODB_URI) {
   throw new Error('Please define the MONGO_URL environment variable');
 }
 
+const readInt = (name, fallback) => parseInt(process.env[name] || String(fallback), 10);
+
+// minPoolSize connections are opened in the background and kept warm, so the
+// first requests on a fresh instance do not pay for a handshake each; idle
+// connections above that floor are closed after MONGO_MAX_IDLE_TIME_MS.
+const POOL_OPTIONS = {
+  maxPoolSize: readInt('MONGO_MAX_POOL_SIZE', 10),
+  minPoolSize: readInt('MONGO_MIN_POOL_SIZE', 2),
+  maxIdleTimeMS: readInt('MONGO_MAX_IDLE_TIME_MS', 60000),
+};
+
+// Missing indexes are created in the background once per process
+// (createIndexesInBackground); with MONGO_CREATE_INDEXES=false Mongoose's own
+// autoIndex builds them instead. Neither ever drops an index: removing
+// indexes no longer in the schemas is the explicit `yarn db:sync-indexes` step.
+const CREATE_INDEXES = process.env.MONGO_CREATE_INDEXES !== 'false';
+const INDEX_RETRY_MS = 30 * 1000;
+const INDEX_RETRY_MAX_MS = 10 * 60 * 1000;
+
 let cached = global.mongoose;
 
 if (!cached) {
-  cached = global.mongoose = { conn: null, promise: null };
+  cached = global.mongoose = { conn: null, promise: null, pool: null, indexes: null };
+}
+
+// Connection pool (CMAP) counters, fed by driver events
+function watchPool(client) {
+  const pool = {
+    ...POOL_OPTIONS,
+    connectedInMs: null,
+    created: 0,
+    closed: 0,
+    checkedOut: 0,
+    checkedIn: 0,
+    checkOutStarted: 0,
+    checkOutFailed: 0,
+    cleared: 0,
+  };
+  client.on('connectionCreated', () => { pool.created += 1; });
+  client.on('connectionClosed', () => { pool.closed += 1; });
+  client.on('connectionCheckOutStarted', () => { pool.checkOutStarted += 1; });
+  client.on('connectionCheckedOut', () => { pool.checkedOut += 1; });
+  client.on('connectionCheckOutFailed', () => { pool.checkOutFailed += 1; });
+  client.on('connectionCheckedIn', () => { pool.checkedIn += 1; });
+  client.on('connectionPoolCleared', () => { pool.cleared += 1; });
+  return pool;
+}
+
+// Started after the first successful connect. Requests do not wait for it:
+// on a populated collection the builds can take a while. A failed attempt is
+// retried with exponential backoff.
+function createIndexesInBackground(retryMs = INDEX_RETRY_MS) {
+  if (!CREATE_INDEXES || cached.indexes) {
+    return;
+  }
+  cached.indexes = span('db-create-indexes', () => Promise.all([
+    User.createIndexes(),
+    LeaveRequest.createIndexes(),
+    LeaveSummary.createIndexes(),
+  ])).then(() => true, (error) => {
+    console.error(`MongoDB index creation failed, retrying in ${retryMs / 1000}s:`, error);
+    setTimeout(() => {
+      cached.indexes = null;
+      createIndexesInBackground(Math.min(retryMs * 2, INDEX_RETRY_MAX_MS));
+    }, retryMs).unref?.();
+  });
 }
 
 async function dbConnect() {
@@ -22,21 +88,54 @@ async function dbConnect() {
     const opts = {
       bufferCommands: false,
       dbName: DB_NAME,
+      autoIndex: !CREATE_INDEXES,
+      ...POOL_OPTIONS,
     };
 
+    const started = Date.now();
     cached.promise = mongoose.connect(MONGODB_URI, opts).then((mongoose) => {
+      cached.pool = watchPool(mongoose.connection.getClient());
+      cached.pool.connectedInMs = Date.now() - started;
       console.log('Connected to MongoDB:', DB_NAME);
       return mongoose;
     });
   }
-  
+
   try {
-    cached.conn = await cached.promise;
-    return cached.conn;
+    cached.conn = await span('db-connect', () => cached.promise);
   } catch (error) {
+    // Let the next request retry instead of replaying the same failure forever
+    cached.promise = null;
     console.error('MongoDB connection error:', error);
     throw error;
   }
+  createIndexesInBackground();
+  return cached.conn;
+}
+
+const isBuild = process.env.NEXT_PHASE === 'phase-production-build';
+
+// Connect (and start index creation) as soon as the server loads this module,
+// rather than on the first request
+if (process.env.MONGO_EAGER_CONNECT !== 'false' && !isBuild && !cached.warmUp) {
+  cached.warmUp = dbConnect().catch((error) => {
+    cached.warmUp = null;
+    console.error('MongoDB warm-up failed:', error);
+  });
+}
+
+export function getPoolStats() {
+  if (!cached.pool) {
+    return { ...POOL_OPTIONS, connected: false };
+  }
+  const { created, closed, checkedOut, checkedIn, checkOutStarted, checkOutFailed } = cached.pool;
+  return {
+    ...cached.pool,
+    connected: mongoose.connection.readyState === 1,
+    open: created - closed,
+    inUse: checkedOut - checkedIn,
+    waiting: checkOutStarted - checkedOut - checkOutFailed,
+  };
 }
 
-export default dbConnect;
\ No newline at end of file
+export default dbConnect;
@@ -0,0 +1,21 @@
+// Fetch a file with the caller's token and save it under the name given by the
+// server's Content-Disposition header (or `fallbackName`).
+export async function downloadFile(url, token, fallbackName) {
+  const headers = token ? { 'Authorization': `Bearer ${token}` } : {};
+  const response = await fetch(url, { headers });
+
+  if (!response.ok) {
+    const error = new Error('Download failed');
+    error.status = response.status;
+    throw error;
+  }
+
+  const disposition = response.headers.get('Content-Disposition') || '';
+  const filename = /filename="([^"]+)"/.exec(disposition)?.[1] || fallbackName;
+  const objectUrl = URL.createObjectURL(await response.blob());
+  const link = document.createElement('a');
+  link.href = objectUrl;
+  link.download = filename;
+  link.click();
+  setTimeout(() => URL.revokeObjectURL(objectUrl), 60 * 1000);
+}
@@ -0,0 +1,70 @@
+// Server-sent events over fetch(), so the request can carry the caller's
+// Authorization header (EventSource cannot). Calls onEvent(type, data) for each
+// event, reconnects with a fresh token after the server's `retry:` delay when
+// the connection drops, and returns a function that closes the stream.
+const DEFAULT_RETRY_MS = 5000;
+
+export function subscribeEventStream(url, getAuthToken, onEvent) {
+  const controller = new AbortController();
+  let retryMs = DEFAULT_RETRY_MS;
+
+  const dispatch = (block) => {
+    let type = 'message';
+    const data = [];
+    for (const line of block.split('\n')) {
+      const [field, ...rest] = line.split(':');
+      const value = rest.join(':').replace(/^ /, '');
+      if (field === 'event') {
+        type = value;
+      } else if (field === 'data') {
+        data.push(value);
+      } else if (field === 'retry' && /^\d+$/.test(value)) {
+        retryMs = parseInt(value, 10);
+      }
+    }
+    if (data.length) {
+      onEvent(type, JSON.parse(data.join('\n')));
+    }
+  };
+
+  const connect = async () => {
+    while (!controller.signal.aborted) {
+      try {
+        const token = await getAuthToken();
+        const response = await fetch(url, {
+          headers: token ? { 'Authorization': `Bearer ${token}` } : {},
+          cache: 'no-store',
+          signal: controller.signal,
+        });
+        if (!response.ok) {
+          // Not allowed or not available: retrying will not help
+          return;
+        }
+
+        const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+        let buffer = '';
+        for (;;) {
+          const { value, done } = await reader.read();
+          if (done) {
+            break;
+          }
+          buffer += value.replace(/\r\n?/g, '\n');
+          let end;
+          while ((end = buffer.indexOf('\n\n')) !== -1) {
+            dispatch(buffer.slice(0, end));
+            buffer = buffer.slice(end + 2);
+          }
+        }
+      } catch (error) {
+        if (controller.signal.aborted) {
+          return;
+        }
+        console.error(`Event stream ${url} interrupted:`, error);
+      }
+      await new Promise((resolve) => setTimeout(resolve, retryMs));
+    }
+  };
+  connect();
+
+  return () => controller.abort();
+}
@@ -4,24 +4,67 @@ import { getAuth } from 'firebase-admin/auth';
 let app;
 let auth;
 
-try {
-  const firebaseAdminConfig = {
-    credential: cert({
-      projectId: process.env.NEXT_PUBLIC_FIREBASE_PROJECT_ID,
-      clientEmail: process.env.FIREBASE_ADMIN_CLIENT_EMAIL,
-      privateKey: process.env.FIREBASE_ADMIN_PRIVATE_KEY?.replace(/\\n/g, '\n'),
-    }),
-  };
+// Stub verifier for local load testing: accepts unsigned "stub:<uid>:<email>"
+// tokens so the API can be exercised without reaching Firebase.
+// Never enable FIREBASE_AUTH_STUB on a deployed instance. As a second guard it
+// is only honoured when NEXT_PUBLIC_BASE_URL points at a loopback address, so
+// the flag alone, left on with a real base URL, cannot turn verification off.
+const LOOPBACK_HOSTS = ['localhost', '127.0.0.1', '[::1]'];
+
+function isLoopbackBaseUrl(value) {
+  try {
+    return LOOPBACK_HOSTS.includes(new URL(value).hostname);
+  } catch (error) {
+    return false;
+  }
+}
 
-  app = getApps().length > 0 ? getApps()[0] : initializeApp(firebaseAdminConfig);
-  auth = getAuth(app);
-} catch (error) {
-  console.warn('Firebase Admin not configured yet. Add your credentials to .env file.');
-  // Mock auth for development
-  auth = {
-    verifyIdToken: () => Promise.reject(new Error('Firebase Admin not configured')),
-    setCustomUserClaims: () => Promise.reject(new Error('Firebase Admin not configured')),
+function createStubAuth() {
+  return {
+    verifyIdToken: async (idToken) => {
+      const [scheme, uid, email] = String(idToken || '').split(':');
+      if (scheme !== 'stub' || !uid) {
+        throw new Error('Invalid stub token');
+      }
+      const iat = Math.floor(Date.now() / 1000);
+      return { uid, email: email || `${uid}@breakly.test`, iat, exp: iat + 3600 };
+    },
+    setCustomUserClaims: async () => {},
   };
 }
 
-export { app, auth };
\ No newline at end of file
+const stubRequested = process.env.FIREBASE_AUTH_STUB === 'true';
+// Looked up by name: Next.js inlines process.env.NEXT_PUBLIC_* at build time,
+// and the guard must see the URL the server is started with
+const BASE_URL_VAR = 'NEXT_PUBLIC_BASE_URL';
+const stubAllowed = stubRequested && isLoopbackBaseUrl(process.env[BASE_URL_VAR]);
+if (stubRequested && !stubAllowed) {
+  console.error('FIREBASE_AUTH_STUB ignored: NEXT_PUBLIC_BASE_URL is not a loopback URL. ID tokens are verified.');
+}
+
+if (stubAllowed) {
+  console.warn('FIREBASE_AUTH_STUB is enabled: ID tokens are NOT verified.');
+  auth = createStubAuth();
+} else {
+  try {
+    const firebaseAdminConfig = {
+      credential: cert({
+        projectId: process.env.NEXT_PUBLIC_FIREBASE_PROJECT_ID,
+        clientEmail: process.env.FIREBASE_ADMIN_CLIENT_EMAIL,
+        privateKey: process.env.FIREBASE_ADMIN_PRIVATE_KEY?.replace(/\\n/g, '\n'),
+      }),
+    };
+
+    app = getApps().length > 0 ? getApps()[0] : initializeApp(firebaseAdminConfig);
+    auth = getAuth(app);
+  } catch (error) {
+    console.warn('Firebase Admin not configured yet. Add your credentials to .env file.');
+    // Mock auth for development
+    auth = {
+      verifyIdToken: () => Promise.reject(new Error('Firebase Admin not configured')),
+      setCustomUserClaims: () => Promise.reject(new Error('Firebase Admin not configured')),
+    };
+  }
+}
+
+export { app, auth };
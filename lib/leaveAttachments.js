@@ -0,0 +1,43 @@
+// Types opened in a new tab. A blob URL has the app's origin, so anything able
+// to run script there (HTML, SVG, ...) is downloaded instead of displayed.
+const VIEWABLE_TYPES = ['application/pdf', 'image/png', 'image/jpeg'];
+
+function attachmentFilename(disposition) {
+  const encoded = /filename\*=UTF-8''([^;]+)/i.exec(disposition)?.[1];
+  if (encoded) {
+    try {
+      return decodeURIComponent(encoded);
+    } catch (error) {
+      // fall through to the plain name
+    }
+  }
+  return /filename="([^"]+)"/.exec(disposition)?.[1] || 'piece-jointe';
+}
+
+// Fetch a leave's attachment with the caller's token; show PDFs and images in
+// a new tab and download everything else.
+// List endpoints only report `hasAttachment`; the file itself is fetched on demand.
+export async function openLeaveAttachment(leaveId, token) {
+  const headers = token ? { 'Authorization': `Bearer ${token}` } : {};
+  const response = await fetch(`/api/leaves/attachment?id=${encodeURIComponent(leaveId)}`, { headers });
+
+  if (!response.ok) {
+    throw new Error('Attachment not available');
+  }
+
+  const type = (response.headers.get('Content-Type') || '').split(';')[0].trim().toLowerCase();
+  const viewable = VIEWABLE_TYPES.includes(type);
+  // Re-typed explicitly: the blob never carries a type the server did not vouch for
+  const blob = new Blob([await response.blob()], { type: viewable ? type : 'application/octet-stream' });
+  const url = URL.createObjectURL(blob);
+
+  if (viewable) {
+    window.open(url, '_blank', 'noopener');
+  } else {
+    const link = document.createElement('a');
+    link.href = url;
+    link.download = attachmentFilename(response.headers.get('Content-Disposition') || '');
+    link.click();
+  }
+  setTimeout(() => URL.revokeObjectURL(url), 60 * 1000);
+}
@@ -0,0 +1,185 @@
+import mongoose from 'mongoose';
+import { v4 as uuidv4 } from 'uuid';
+import User from '@/models/User';
+import LeaveRequest from '@/models/LeaveRequest';
+import LeaveSummary from '@/models/LeaveSummary';
+import { invalidateProfile } from '@/lib/profileCache';
+import { invalidateOrgStats } from '@/lib/orgStats';
+import { decidedSummaryOp } from '@/lib/leaveSummary';
+import { span } from '@/lib/tracing';
+
+export const MAX_BATCH_SIZE = 100;
+
+// maternity and paternity leave are drawn from the personal balance
+export function balanceFieldFor(type) {
+  return `leaveBalance.${type === 'annual' ? 'annual' : type === 'sick' ? 'sick' : 'personal'}`;
+}
+
+// Standalone mongod (local development) has no transactions. Remember the
+// first refusal and run the writes without a session from then on.
+let transactionsSupported;
+
+const isTransactionUnsupported = (error) =>
+  error?.code === 20 || /Transaction numbers are only allowed/.test(error?.message || '');
+
+export async function withOptionalTransaction(work) {
+  if (transactionsSupported !== false) {
+    const session = await mongoose.startSession();
+    try {
+      let result;
+      await session.withTransaction(async () => {
+        result = await work(session);
+      });
+      transactionsSupported = true;
+      return result;
+    } catch (error) {
+      if (!isTransactionUnsupported(error)) {
+        throw error;
+      }
+      transactionsSupported = false;
+      console.warn('MongoDB transactions unavailable, applying leave decisions without one');
+    } finally {
+      await session.endSession();
+    }
+  }
+  return work(null);
+}
+
+// Approve or reject one leave request: a single update conditional on status
+// 'pending', then one $inc of the employee's balance only if that update
+// matched. Concurrent or retried calls for the same request therefore move it
+// out of pending - and deduct the balance - exactly once.
+//
+// Returns { leave, applied }: the updated request when this call decided it,
+// otherwise its current state (null when it does not exist).
+export async function applyLeaveDecision(approverUid, { leaveId, action, rejectionReason }) {
+  const decided = await withOptionalTransaction(async (session) => {
+    const leave = await LeaveRequest.findOneAndUpdate(
+      { id: leaveId, status: 'pending' },
+      {
+        $set: {
+          status: action === 'approve' ? 'approved' : 'rejected',
+          approvedBy: approverUid,
+          approvedAt: new Date(),
+          ...(action === 'reject' && rejectionReason && { rejectionReason }),
+        },
+      },
+      { new: true, projection: { attachment: 0 }, session }
+    ).lean();
+
+    if (leave?.status === 'approved') {
+      await User.updateOne(
+        { uid: leave.employeeUid },
+        { $inc: { [balanceFieldFor(leave.type)]: -leave.days } },
+        { session }
+      );
+    }
+    if (leave) {
+      await span('mongo.LeaveSummary.bulkWrite', () => LeaveSummary.bulkWrite([decidedSummaryOp(leave)], { session }));
+    }
+    return leave;
+  });
+
+  if (!decided) {
+    return { leave: await LeaveRequest.findOne({ id: leaveId }, { attachment: 0 }).lean(), applied: false };
+  }
+
+  invalidateProfile(decided.employeeUid);
+  invalidateOrgStats();
+  return { leave: decided, applied: true };
+}
+
+// Approve or reject many leave requests in one round-trip per collection.
+//
+// Every update is conditional on status 'pending' and stamps a per-call
+// decisionId, so reading back by that id yields exactly the requests this call
+// moved out of pending - even without a transaction, a request decided
+// concurrently elsewhere is neither reported nor deducted twice.
+//
+// items: [{ leaveId, action: 'approve' | 'reject', rejectionReason? }]
+// Returns one result per distinct leaveId, in request order.
+export async function applyLeaveDecisions(approverUid, items) {
+  const decisions = new Map();
+  for (const item of items) {
+    if (!decisions.has(item.leaveId)) {
+      decisions.set(item.leaveId, item);
+    }
+  }
+  const leaveIds = [...decisions.keys()];
+  const decisionId = uuidv4();
+  const decidedAt = new Date();
+
+  const decided = await withOptionalTransaction(async (session) => {
+    await span('mongo.LeaveRequest.bulkWrite', () => LeaveRequest.bulkWrite(
+      [...decisions.values()].map(({ leaveId, action, rejectionReason }) => ({
+        updateOne: {
+          filter: { id: leaveId, status: 'pending' },
+          update: {
+            $set: {
+              status: action === 'approve' ? 'approved' : 'rejected',
+              approvedBy: approverUid,
+              approvedAt: decidedAt,
+              decisionId,
+              ...(action === 'reject' && rejectionReason && { rejectionReason }),
+            },
+          },
+        },
+      })),
+      { ordered: false, session }
+    ));
+
+    const leaves = await LeaveRequest.find(
+      { id: { $in: leaveIds }, decisionId },
+      'id employeeUid type days status startDate'
+    ).session(session).lean();
+
+    // One aggregated $inc per affected employee
+    const deductions = new Map();
+    for (const leave of leaves.filter((leave) => leave.status === 'approved')) {
+      const inc = deductions.get(leave.employeeUid) || {};
+      const field = balanceFieldFor(leave.type);
+      inc[field] = (inc[field] || 0) - leave.days;
+      deductions.set(leave.employeeUid, inc);
+    }
+    if (deductions.size > 0) {
+      await span('mongo.User.bulkWrite', () => User.bulkWrite(
+        [...deductions].map(([uid, inc]) => ({
+          updateOne: { filter: { uid }, update: { $inc: inc } },
+        })),
+        { ordered: false, session }
+      ));
+    }
+
+    if (leaves.length > 0) {
+      await span('mongo.LeaveSummary.bulkWrite', () => LeaveSummary.bulkWrite(
+        leaves.map(decidedSummaryOp),
+        { ordered: false, session }
+      ));
+    }
+
+    return leaves;
+  });
+
+  new Set(decided.map((leave) => leave.employeeUid)).forEach(invalidateProfile);
+  if (decided.length > 0) {
+    invalidateOrgStats();
+  }
+
+  const decidedById = new Map(decided.map((leave) => [leave.id, leave]));
+  const undecidedIds = leaveIds.filter((id) => !decidedById.has(id));
+  const current = undecidedIds.length
+    ? new Map((await LeaveRequest.find({ id: { $in: undecidedIds } }, 'id status').lean())
+      .map((leave) => [leave.id, leave.status]))
+    : new Map();
+
+  return leaveIds.map((leaveId) => {
+    const leave = decidedById.get(leaveId);
+    if (leave) {
+      return { leaveId, ok: true, status: leave.status };
+    }
+    if (!current.has(leaveId)) {
+      return { leaveId, ok: false, error: 'Leave request not found' };
+    }
+    return { leaveId, ok: false, status: current.get(leaveId), error: 'Leave request already processed' };
+  });
+}
@@ -0,0 +1,116 @@
+import LeaveRequest from '@/models/LeaveRequest';
+
+// Columns of an export, in order. Attachment contents are never exported.
+const COLUMNS = [
+  'id', 'employeeUid', 'employeeName', 'employeeEmail', 'department', 'type', 'status',
+  'startDate', 'endDate', 'days', 'reason', 'approvedBy', 'approvedAt', 'rejectionReason', 'createdAt',
+];
+const PROJECTION = Object.fromEntries([['_id', 0], ...COLUMNS.map((column) => [column, 1])]);
+
+export const EXPORT_FORMATS = {
+  csv: 'text/csv; charset=utf-8',
+  ndjson: 'application/x-ndjson',
+};
+
+// Documents pulled from the cursor per chunk handed to the response stream
+const ROWS_PER_CHUNK = 200;
+
+const STATUSES = LeaveRequest.schema.path('status').enumValues;
+const TYPES = LeaveRequest.schema.path('type').enumValues;
+
+// Build the Mongo filter from ?from&to&department&status&type (status and type
+// accept comma-separated lists). Returns { filter } or { error }.
+export function buildExportFilter(searchParams) {
+  const filter = {};
+
+  const from = searchParams.get('from');
+  const to = searchParams.get('to');
+  if (from || to) {
+    const fromDate = from && new Date(from);
+    const toDate = to && new Date(to);
+    if ((fromDate && Number.isNaN(fromDate.getTime())) || (toDate && Number.isNaN(toDate.getTime()))) {
+      return { error: 'from and to must be dates (YYYY-MM-DD)' };
+    }
+    // Leaves overlapping [from, to], as for the team calendar
+    if (fromDate) {
+      filter.endDate = { $gte: fromDate };
+    }
+    if (toDate) {
+      filter.startDate = { $lte: toDate };
+    }
+  }
+
+  if (searchParams.get('department')) {
+    filter.department = searchParams.get('department');
+  }
+
+  for (const [param, allowed] of [['status', STATUSES], ['type', TYPES]]) {
+    const values = (searchParams.get(param) || '').split(',').filter(Boolean);
+    if (values.some((value) => !allowed.includes(value))) {
+      return { error: `${param} must be among ${allowed.join(', ')}` };
+    }
+    if (values.length) {
+      filter[param] = { $in: values };
+    }
+  }
+
+  return { filter };
+}
+
+const formatValue = (value) => (value instanceof Date ? value.toISOString() : value ?? '');
+
+// Quote when needed, and defuse values a spreadsheet would run as formulas
+function csvField(value) {
+  let text = String(formatValue(value));
+  if (/^[=+\-@\t\r]/.test(text)) {
+    text = `'${text}`;
+  }
+  return /[",\r\n]/.test(text) ? `"${text.replace(/"/g, '""')}"` : text;
+}
+
+const encoders = {
+  csv: (leave) => `${COLUMNS.map((column) => csvField(leave[column])).join(',')}\r\n`,
+  ndjson: (leave) => `${JSON.stringify(Object.fromEntries(COLUMNS.map((column) => [column, leave[column] ?? null])))}\n`,
+};
+
+// Stream the matching leave requests as a web ReadableStream. Documents are
+// pulled from the cursor only when the client has consumed the previous chunk,
+// so memory stays at one chunk whatever the size of the export.
+export function streamLeaveExport(filter, format) {
+  const encoder = new TextEncoder();
+  const encode = encoders[format];
+  let cursor;
+
+  return new ReadableStream({
+    start(controller) {
+      cursor = LeaveRequest.find(filter, PROJECTION).lean().cursor({ batchSize: ROWS_PER_CHUNK });
+      if (format === 'csv') {
+        controller.enqueue(encoder.encode(`${COLUMNS.join(',')}\r\n`));
+      }
+    },
+    async pull(controller) {
+      try {
+        let chunk = '';
+        for (let rows = 0; rows < ROWS_PER_CHUNK; rows++) {
+          const leave = await cursor.next();
+          if (!leave) {
+            if (chunk) {
+              controller.enqueue(encoder.encode(chunk));
+            }
+            controller.close();
+            await cursor.close();
+            return;
+          }
+          chunk += encode(leave);
+        }
+        controller.enqueue(encoder.encode(chunk));
+      } catch (error) {
+        controller.error(error);
+        await cursor.close().catch(() => {});
+      }
+    },
+    async cancel() {
+      await cursor.close();
+    },
+  }, { highWaterMark: 1 });
+}
@@ -0,0 +1,102 @@
+import LeaveRequest from '@/models/LeaveRequest';
+import LeaveSummary from '@/models/LeaveSummary';
+import { span } from '@/lib/tracing';
+
+const STATUSES = ['pending', 'approved', 'rejected'];
+const REBUILD_BATCH_SIZE = 1000;
+
+const summaryKey = (leave) => ({
+  employeeUid: leave.employeeUid,
+  year: new Date(leave.startDate).getUTCFullYear(),
+});
+
+const counters = (leave, status, sign) => ({
+  [`types.${leave.type}.${status}.requests`]: sign,
+  [`types.${leave.type}.${status}.days`]: sign * leave.days,
+});
+
+// bulkWrite operation counting a newly created (pending) leave request
+export function createdSummaryOp(leave) {
+  return {
+    updateOne: {
+      filter: summaryKey(leave),
+      update: { $inc: counters(leave, 'pending', 1) },
+      upsert: true,
+    },
+  };
+}
+
+// bulkWrite operation moving a decided leave request out of 'pending'
+// (leave.status is the new status)
+export function decidedSummaryOp(leave) {
+  return {
+    updateOne: {
+      filter: summaryKey(leave),
+      update: { $inc: { ...counters(leave, 'pending', -1), ...counters(leave, leave.status, 1) } },
+      upsert: true,
+    },
+  };
+}
+
+export async function recordLeaveCreated(leave) {
+  await span('mongo.LeaveSummary.bulkWrite', () => LeaveSummary.bulkWrite([createdSummaryOp(leave)]));
+}
+
+// An employee's year as { year, types, totals }; one indexed document read
+export async function getLeaveSummary(employeeUid, year) {
+  const summary = await LeaveSummary.findOne({ employeeUid, year }, { _id: 0, types: 1 }).lean();
+  const types = summary?.types || {};
+
+  const totals = Object.fromEntries(STATUSES.map((status) => [status, { requests: 0, days: 0 }]));
+  for (const byStatus of Object.values(types)) {
+    for (const status of STATUSES) {
+      totals[status].requests += byStatus[status]?.requests || 0;
+      totals[status].days += byStatus[status]?.days || 0;
+    }
+  }
+  return { year, types, totals };
+}
+
+// Recompute summaries from the LeaveRequest collection, for one employee or
+// for everyone, and drop summaries that no longer match any request. Meant for
+// repairs and backfills: increments landing while it runs can be overwritten.
+export async function rebuildLeaveSummaries({ employeeUid } = {}) {
+  const scope = employeeUid ? { employeeUid } : {};
+  const rebuiltAt = new Date();
+
+  const groups = await LeaveRequest.aggregate([
+    { $match: scope },
+    {
+      $group: {
+        _id: { employeeUid: '$employeeUid', year: { $year: '$startDate' }, type: '$type', status: '$status' },
+        requests: { $sum: 1 },
+        days: { $sum: '$days' },
+      },
+    },
+  ]).allowDiskUse(true);
+
+  const summaries = new Map();
+  for (const { _id: { employeeUid: uid, year, type, status }, requests, days } of groups) {
+    const key = `${uid}\u0000${year}`;
+    const summary = summaries.get(key) || { employeeUid: uid, year, types: {}, rebuiltAt };
+    summary.types[type] = { ...summary.types[type], [status]: { requests, days } };
+    summaries.set(key, summary);
+  }
+
+  const docs = [...summaries.values()];
+  for (let offset = 0; offset < docs.length; offset += REBUILD_BATCH_SIZE) {
+    await LeaveSummary.bulkWrite(
+      docs.slice(offset, offset + REBUILD_BATCH_SIZE).map((summary) => ({
+        replaceOne: {
+          filter: { employeeUid: summary.employeeUid, year: summary.year },
+          replacement: summary,
+          upsert: true,
+        },
+      })),
+      { ordered: false }
+    );
+  }
+
+  const { deletedCount } = await LeaveSummary.deleteMany({ ...scope, rebuiltAt: { $ne: rebuiltAt } });
+  return { summaries: docs.length, removed: deletedCount };
+}
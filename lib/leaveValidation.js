@@ -0,0 +1,92 @@
+import User from '@/models/User';
+import LeaveRequest from '@/models/LeaveRequest';
+import { countWorkingDays } from '@/lib/workingDays';
+import { balanceFieldFor } from '@/lib/leaveDecisions';
+
+const LEAVE_TYPES = LeaveRequest.schema.path('type').enumValues;
+const MAX_LEAVE_SPAN_DAYS = 366;
+// Both validation queries run concurrently under this server-side time limit
+const VALIDATION_BUDGET_MS = parseInt(process.env.LEAVE_VALIDATION_BUDGET_MS || '200', 10);
+// Sick and family leave are never refused for lack of balance
+const BALANCE_CHECKED_TYPES = ['annual', 'personal'];
+
+const isMaxTimeExpired = (error) => error?.code === 50 || error?.codeName === 'MaxTimeMSExpired';
+
+// Days already requested and awaiting a decision. Approval deducts them from
+// the balance `type` is drawn from, so they are not available to new requests
+// drawing on it (personal leave shares its balance with maternity and paternity).
+async function pendingDays(uid, type) {
+  const field = balanceFieldFor(type);
+  const types = LEAVE_TYPES.filter((other) => balanceFieldFor(other) === field);
+  const [total] = await LeaveRequest.aggregate([
+    { $match: { employeeUid: uid, status: 'pending', type: { $in: types } } },
+    { $group: { _id: null, days: { $sum: '$days' } } },
+  ]).option({ maxTimeMS: VALIDATION_BUDGET_MS });
+  return total?.days || 0;
+}
+
+// Check a new leave request before it is stored: dates, working-day count,
+// overlap with the employee's pending or approved requests, and balance net
+// of pending requests drawn from the same balance.
+//
+// Returns { start, end, days } when the request can be created, otherwise
+// { status, error, ...details } to send back as is.
+export async function validateNewLeave(uid, { type, startDate, endDate }) {
+  if (!LEAVE_TYPES.includes(type)) {
+    return { status: 400, error: `type must be one of ${LEAVE_TYPES.join(', ')}` };
+  }
+
+  const start = new Date(startDate);
+  const end = new Date(endDate);
+  if (Number.isNaN(start.getTime()) || Number.isNaN(end.getTime())) {
+    return { status: 400, error: 'startDate and endDate must be dates (YYYY-MM-DD)' };
+  }
+  if (end < start || end - start > MAX_LEAVE_SPAN_DAYS * 24 * 60 * 60 * 1000) {
+    return { status: 400, error: `endDate must be within ${MAX_LEAVE_SPAN_DAYS} days after startDate` };
+  }
+
+  const days = countWorkingDays(start, end);
+  if (days === 0) {
+    return { status: 400, error: 'The selected period contains no working day' };
+  }
+
+  const checkBalance = BALANCE_CHECKED_TYPES.includes(type);
+  let overlap;
+  let user;
+  let pending;
+  try {
+    [overlap, user, pending] = await Promise.all([
+      // { employeeUid, status, endDate, startDate } index: both bounds are
+      // checked on index keys, only a conflicting request is fetched
+      LeaveRequest.findOne(
+        {
+          employeeUid: uid,
+          status: { $in: ['pending', 'approved'] },
+          endDate: { $gte: start },
+          startDate: { $lte: end },
+        },
+        { _id: 0, id: 1, startDate: 1, endDate: 1, status: 1 }
+      ).maxTimeMS(VALIDATION_BUDGET_MS).lean(),
+      checkBalance
+        ? User.findOne({ uid }, { _id: 0, leaveBalance: 1 }).maxTimeMS(VALIDATION_BUDGET_MS).lean()
+        : null,
+      checkBalance ? pendingDays(uid, type) : 0,
+    ]);
+  } catch (error) {
+    if (isMaxTimeExpired(error)) {
+      return { status: 503, error: 'Leave validation timed out, please retry' };
+    }
+    throw error;
+  }
+
+  if (overlap) {
+    return { status: 409, error: 'Overlaps an existing leave request', conflict: overlap };
+  }
+
+  const available = user?.leaveBalance?.[type] - pending;
+  if (user && available < days) {
+    return { status: 400, error: 'Insufficient leave balance', available: Math.max(available, 0), pending, requested: days };
+  }
+
+  return { start, end, days };
+}
@@ -0,0 +1,62 @@
+// Small in-process LRU cache with per-entry expiry.
+// A Map keeps insertion order, so re-inserting on read makes the first key the
+// least recently used one.
+export class LRUCache {
+  constructor({ max = 1000, ttl = 60 * 1000 } = {}) {
+    this.max = max;
+    this.ttl = ttl;
+    this.entries = new Map();
+    this.hits = 0;
+    this.misses = 0;
+    this.evictions = 0;
+  }
+
+  get(key) {
+    const entry = this.entries.get(key);
+    if (!entry || entry.expiresAt <= Date.now()) {
+      if (entry) {
+        this.entries.delete(key);
+      }
+      this.misses += 1;
+      return undefined;
+    }
+
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+    this.hits += 1;
+    return entry.value;
+  }
+
+  set(key, value, ttl = this.ttl) {
+    this.entries.delete(key);
+    if (!(ttl > 0)) {
+      return;
+    }
+
+    this.entries.set(key, { value, expiresAt: Date.now() + ttl });
+    while (this.entries.size > this.max) {
+      this.entries.delete(this.entries.keys().next().value);
+      this.evictions += 1;
+    }
+  }
+
+  delete(key) {
+    this.entries.delete(key);
+  }
+
+  clear() {
+    this.entries.clear();
+  }
+
+  stats() {
+    const lookups = this.hits + this.misses;
+    return {
+      size: this.entries.size,
+      max: this.max,
+      hits: this.hits,
+      misses: this.misses,
+      evictions: this.evictions,
+      hitRate: lookups ? this.hits / lookups : 0,
+    };
+  }
+}
@@ -0,0 +1,77 @@
+import LeaveRequest from '@/models/LeaveRequest';
+import { LRUCache } from '@/lib/lruCache';
+
+const LATENCY_WINDOW_DAYS = 90;
+const HOUR_MS = 60 * 60 * 1000;
+
+// Org-wide numbers are the same for every manager, so one computation serves
+// them all for ORG_STATS_TTL_MS. The pending promise is cached, so concurrent
+// dashboard loads on a cold cache share a single set of aggregations.
+const cache = new LRUCache({
+  max: 1,
+  ttl: parseInt(process.env.ORG_STATS_TTL_MS || '30000', 10),
+});
+
+async function computeOrgStats() {
+  const now = new Date();
+  const yearStart = new Date(Date.UTC(now.getUTCFullYear(), 0, 1));
+  const nextYearStart = new Date(Date.UTC(now.getUTCFullYear() + 1, 0, 1));
+  const latencySince = new Date(now.getTime() - LATENCY_WINDOW_DAYS * 24 * HOUR_MS);
+
+  const [pendingByDepartment, daysTakenByType, [latency]] = await Promise.all([
+    LeaveRequest.aggregate([
+      { $match: { status: 'pending' } },
+      { $group: { _id: '$department', count: { $sum: 1 } } },
+      { $sort: { count: -1 } },
+    ]),
+    LeaveRequest.aggregate([
+      { $match: { status: 'approved', endDate: { $gte: yearStart }, startDate: { $lt: nextYearStart } } },
+      { $group: { _id: '$type', days: { $sum: '$days' } } },
+    ]),
+    LeaveRequest.aggregate([
+      { $match: { approvedAt: { $gte: latencySince } } },
+      { $project: { latency: { $subtract: ['$approvedAt', '$createdAt'] } } },
+      {
+        $group: {
+          _id: null,
+          decisions: { $sum: 1 },
+          average: { $avg: '$latency' },
+          max: { $max: '$latency' },
+        },
+      },
+    ]),
+  ]);
+
+  return {
+    year: now.getUTCFullYear(),
+    pendingApprovals: pendingByDepartment.reduce((sum, { count }) => sum + count, 0),
+    pendingByDepartment: pendingByDepartment.map(({ _id, count }) => ({ department: _id || null, count })),
+    daysTakenByType: Object.fromEntries(daysTakenByType.map(({ _id, days }) => [_id, days])),
+    approvalLatency: {
+      windowDays: LATENCY_WINDOW_DAYS,
+      decisions: latency?.decisions || 0,
+      averageHours: latency ? latency.average / HOUR_MS : null,
+      maxHours: latency ? latency.max / HOUR_MS : null,
+    },
+    generatedAt: now.toISOString(),
+  };
+}
+
+// Callers must have awaited dbConnect() first.
+export function getOrgStats() {
+  let stats = cache.get('org');
+  if (!stats) {
+    stats = computeOrgStats();
+    stats.catch(() => cache.delete('org'));
+    cache.set('org', stats);
+  }
+  return stats;
+}
+
+export function invalidateOrgStats() {
+  cache.delete('org');
+}
+
+export function getOrgStatsCacheStats() {
+  return cache.stats();
+}
@@ -0,0 +1,109 @@
+import LeaveRequest from '@/models/LeaveRequest';
+import { LEAVE_PROJECTION, toLeaveDTO } from '@/lib/serializers';
+
+// Changes to the approval queue, fanned out to every subscriber in this
+// process from a single source:
+//   { type: 'upsert', leave }      a request is (now) pending
+//   { type: 'remove', id, status } a request left the queue
+//
+// The source is a MongoDB change stream. Standalone servers (local
+// development) have none, so the feed falls back to polling updatedAt every
+// PENDING_POLL_INTERVAL_MS.
+const POLL_INTERVAL_MS = parseInt(process.env.PENDING_POLL_INTERVAL_MS || '2000', 10);
+const STATUSES = LeaveRequest.schema.path('status').enumValues;
+
+const subscribers = new Set();
+let source = null;
+
+const isChangeStreamUnsupported = (error) =>
+  error?.code === 40573 || /only supported on replica sets/i.test(error?.message || '');
+
+function publish(event) {
+  subscribers.forEach((subscriber) => subscriber(event));
+}
+
+const eventFor = (leave) => (leave.status === 'pending'
+  ? { type: 'upsert', leave }
+  : { type: 'remove', id: leave.id, status: leave.status });
+
+function watchChangeStream() {
+  const stream = LeaveRequest.watch(
+    [{ $match: { operationType: { $in: ['insert', 'update', 'replace'] } } }],
+    { fullDocument: 'updateLookup' }
+  );
+  stream.on('change', (change) => {
+    const statusChanged = change.operationType !== 'update' || 'status' in change.updateDescription.updatedFields;
+    if (change.fullDocument && statusChanged) {
+      publish(eventFor(toLeaveDTO(change.fullDocument)));
+    }
+  });
+  stream.on('error', (error) => {
+    stream.close().catch(() => {});
+    if (source?.close !== stopStream) {
+      return;
+    }
+    if (isChangeStreamUnsupported(error)) {
+      console.warn('MongoDB change streams unavailable, polling the approval queue instead');
+    } else {
+      console.error('Pending leaves change stream error:', error);
+    }
+    source = subscribers.size ? poll() : null;
+  });
+
+  function stopStream() {
+    return stream.close();
+  }
+  return { close: stopStream };
+}
+
+function poll() {
+  // Requests updated in the same millisecond as the last one seen are
+  // re-read on the next tick; `seenAtLatest` keeps them from repeating.
+  let latest = new Date();
+  let seenAtLatest = new Set();
+  let timer;
+
+  const tick = async () => {
+    try {
+      const leaves = await LeaveRequest.find(
+        { status: { $in: STATUSES }, updatedAt: { $gte: latest } },
+        LEAVE_PROJECTION
+      ).sort({ updatedAt: 1 }).lean();
+
+      for (const leave of leaves) {
+        const key = `${leave.id}@${leave.updatedAt.getTime()}`;
+        if (leave.updatedAt.getTime() === latest.getTime() && seenAtLatest.has(key)) {
+          continue;
+        }
+        if (leave.updatedAt > latest) {
+          latest = leave.updatedAt;
+          seenAtLatest = new Set();
+        }
+        seenAtLatest.add(key);
+        publish(eventFor(leave));
+      }
+    } catch (error) {
+      console.error('Pending leaves poll error:', error);
+    }
+    timer = setTimeout(tick, POLL_INTERVAL_MS);
+  };
+  timer = setTimeout(tick, POLL_INTERVAL_MS);
+
+  return { close: async () => clearTimeout(timer) };
+}
+
+// Callers must have awaited dbConnect() first. Returns an unsubscribe function.
+export function subscribePending(subscriber) {
+  subscribers.add(subscriber);
+  if (!source) {
+    source = watchChangeStream();
+  }
+
+  return () => {
+    subscribers.delete(subscriber);
+    if (subscribers.size === 0 && source) {
+      source.close().catch(() => {});
+      source = null;
+    }
+  };
+}
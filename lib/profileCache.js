@@ -0,0 +1,34 @@
+import User from '@/models/User';
+import { LRUCache } from '@/lib/lruCache';
+
+// Profile fields the API handlers read for authorization and display.
+const PROFILE_FIELDS = 'uid email displayName role department leaveBalance';
+
+// Short TTL bounds staleness for writes made by other instances; writes made
+// here invalidate the entry directly.
+const cache = new LRUCache({
+  max: parseInt(process.env.PROFILE_CACHE_SIZE || '5000', 10),
+  ttl: parseInt(process.env.PROFILE_CACHE_TTL_MS || '30000', 10),
+});
+
+// Callers must have awaited dbConnect() first.
+export async function getProfile(uid) {
+  const cached = cache.get(uid);
+  if (cached) {
+    return cached;
+  }
+
+  const profile = await User.findOne({ uid }, PROFILE_FIELDS).lean();
+  if (profile) {
+    cache.set(uid, profile);
+  }
+  return profile;
+}
+
+export function invalidateProfile(uid) {
+  cache.delete(uid);
+}
+
+export function getProfileCacheStats() {
+  return cache.stats();
+}
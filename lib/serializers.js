@@ -0,0 +1,49 @@
+// Fixed response shapes for the API read paths.
+//
+// List and profile reads project exactly these fields in MongoDB and skip
+// Mongoose hydration (.lean() / aggregate), so what comes back from the driver
+// is what gets serialized. Missing optional fields come back as null, keeping
+// every row the same shape. No _id / __v, and no inline attachment unless asked.
+//
+// Kept free of app imports: scripts/bench-serialization.js loads it directly.
+
+export const USER_FIELDS = [
+  'uid', 'email', 'displayName', 'role', 'department', 'manager', 'phoneNumber', 'photoURL',
+  'lastLogin', 'leaveBalance', 'createdAt', 'updatedAt',
+];
+
+export const LEAVE_FIELDS = [
+  'id', 'employeeUid', 'employeeName', 'employeeEmail', 'department', 'type', 'startDate', 'endDate',
+  'days', 'reason', 'status', 'approvedBy', 'approvedAt', 'rejectionReason', 'createdAt', 'updatedAt',
+];
+
+// Stored in GridFS (attachmentFile) or, for older requests, inline (attachment)
+const HAS_ATTACHMENT = {
+  $or: [
+    { $gt: ['$attachmentFile.fileId', null] },
+    { $gt: [{ $strLenBytes: { $ifNull: ['$attachment', ''] } }, 0] },
+  ],
+};
+
+const projection = (fields) => Object.fromEntries([
+  ['_id', 0],
+  ...fields.map((field) => [field, { $ifNull: [`$${field}`, null] }]),
+]);
+
+// find() projection and aggregate $project stage body (MongoDB 4.4+)
+export const USER_PROJECTION = projection(USER_FIELDS);
+export const LEAVE_PROJECTION = { ...projection(LEAVE_FIELDS), hasAttachment: HAS_ATTACHMENT };
+
+const pick = (source, fields) => Object.fromEntries(fields.map((field) => [field, source[field] ?? null]));
+
+// The same shapes for objects already in memory (created or updated documents)
+export function toUserDTO(user) {
+  return pick(user, USER_FIELDS);
+}
+
+export function toLeaveDTO(leave) {
+  return {
+    ...pick(leave, LEAVE_FIELDS),
+    hasAttachment: Boolean(leave.attachmentFile?.fileId || leave.attachment),
+  };
+}
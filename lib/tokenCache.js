@@ -0,0 +1,23 @@
+import { auth } from '@/lib/firebaseAdmin';
+import { LRUCache } from '@/lib/lruCache';
+
+// Verified ID tokens, keyed by the raw token. An entry never outlives the
+// token's own `exp`, so a cache hit is exactly as valid as a fresh check.
+const cache = new LRUCache({
+  max: parseInt(process.env.AUTH_TOKEN_CACHE_SIZE || '5000', 10),
+});
+
+export async function verifyIdToken(idToken) {
+  const cached = cache.get(idToken);
+  if (cached) {
+    return cached;
+  }
+
+  const decodedToken = await auth.verifyIdToken(idToken);
+  cache.set(idToken, decodedToken, decodedToken.exp * 1000 - Date.now());
+  return decodedToken;
+}
+
+export function getTokenCacheStats() {
+  return cache.stats();
+}
@@ -0,0 +1,166 @@
+import { AsyncLocalStorage } from 'async_hooks';
+
+// Per-request stage timings for the catch-all API route.
+//
+// withTrace() opens a trace around one request; span() and the Mongoose plugin
+// below add the time spent in each stage to it. When the request finishes the
+// stages go out as a Server-Timing header and into rolling per-route windows
+// that GET /api/metrics reports. Stages of concurrent work overlap, so their sum
+// can exceed `total`.
+const storage = new AsyncLocalStorage();
+
+const WINDOW_SIZE = parseInt(process.env.TRACE_WINDOW_SIZE || '1024', 10);
+// Unknown paths all hit the default handlers; cap the number of route keys
+const MAX_ROUTES = 64;
+
+// The most recent WINDOW_SIZE samples of one timing, in a ring buffer
+class RollingWindow {
+  constructor(size = WINDOW_SIZE) {
+    this.samples = new Float64Array(size);
+    this.next = 0;
+    this.filled = 0;
+    this.count = 0;
+  }
+
+  add(value) {
+    this.samples[this.next] = value;
+    this.next = (this.next + 1) % this.samples.length;
+    this.filled = Math.min(this.filled + 1, this.samples.length);
+    this.count += 1;
+  }
+
+  summary() {
+    const values = this.samples.slice(0, this.filled).sort();
+    const at = (pct) => (values.length ? values[Math.min(values.length - 1, Math.floor(values.length * pct))] : 0);
+    const sum = values.reduce((total, value) => total + value, 0);
+    return {
+      count: this.count,
+      window: values.length,
+      mean: values.length ? round(sum / values.length) : 0,
+      p50: round(at(0.5)),
+      p95: round(at(0.95)),
+      p99: round(at(0.99)),
+      max: round(values.length ? values[values.length - 1] : 0),
+    };
+  }
+}
+
+const routes = new Map();
+
+const round = (ms) => Math.round(ms * 100) / 100;
+
+function routeTimings(route) {
+  let timings = routes.get(route);
+  if (!timings) {
+    if (routes.size >= MAX_ROUTES && !route.endsWith(' (other)')) {
+      return routeTimings(`${route.split(' ')[0]} (other)`);
+    }
+    timings = { total: new RollingWindow(), errors: 0, stages: new Map() };
+    routes.set(route, timings);
+  }
+  return timings;
+}
+
+function record(name, ms) {
+  const trace = storage.getStore();
+  if (!trace) {
+    return;
+  }
+  const stage = trace.stages.get(name) || { ms: 0, calls: 0 };
+  stage.ms += ms;
+  stage.calls += 1;
+  trace.stages.set(name, stage);
+}
+
+// Time fn() (sync or async) as one call of stage `name` in the current trace
+export function span(name, fn) {
+  const started = performance.now();
+  const done = () => record(name, performance.now() - started);
+
+  const result = fn();
+  if (result && typeof result.then === 'function') {
+    return result.finally(done);
+  }
+  done();
+  return result;
+}
+
+function serverTiming(stages, total) {
+  const entries = [...stages].map(([name, { ms, calls }]) =>
+    `${name};dur=${ms.toFixed(1)}${calls > 1 ? `;desc="x${calls}"` : ''}`
+  );
+  entries.push(`total;dur=${total.toFixed(1)}`);
+  return entries.join(', ');
+}
+
+// Run one request handler inside a trace for `route` (e.g. 'GET /leaves')
+export async function withTrace(route, handler) {
+  const trace = { stages: new Map() };
+  const started = performance.now();
+  let response;
+  try {
+    response = await storage.run(trace, handler);
+    return response;
+  } finally {
+    const total = performance.now() - started;
+    const timings = routeTimings(route);
+    timings.total.add(total);
+    if (!response || response.status >= 500) {
+      timings.errors += 1;
+    }
+    for (const [name, { ms }] of trace.stages) {
+      let window = timings.stages.get(name);
+      if (!window) {
+        window = new RollingWindow();
+        timings.stages.set(name, window);
+      }
+      window.add(ms);
+    }
+    response?.headers.set('Server-Timing', serverTiming(trace.stages, total));
+  }
+}
+
+// Time every query and aggregation issued through a schema's model
+export function mongooseTiming(schema) {
+  const ops = [
+    'countDocuments', 'deleteMany', 'deleteOne', 'distinct', 'find', 'findOne',
+    'findOneAndDelete', 'findOneAndUpdate', 'updateMany', 'updateOne',
+  ];
+  const start = function () {
+    this._traceStarted = performance.now();
+  };
+  const finish = function () {
+    if (this._traceStarted !== undefined) {
+      const model = this.model?.modelName || this.model()?.modelName;
+      record(`mongo.${model}.${this.op || 'aggregate'}`, performance.now() - this._traceStarted);
+    }
+  };
+
+  const queryOnly = { document: false, query: true };
+  schema.pre(ops, queryOnly, start);
+  schema.post(ops, queryOnly, finish);
+  schema.post(ops, queryOnly, function (error, res, next) {
+    finish.call(this);
+    next(error);
+  });
+  schema.pre('aggregate', start);
+  schema.post('aggregate', finish);
+
+  schema.pre('save', function () {
+    this.$locals.traceStarted = performance.now();
+  });
+  schema.post('save', function () {
+    record(`mongo.${this.constructor.modelName}.save`, performance.now() - this.$locals.traceStarted);
+  });
+}
+
+export function getRouteTimings() {
+  return Object.fromEntries([...routes].map(([route, { total, errors, stages }]) => [
+    route,
+    {
+      ...total.summary(),
+      errors,
+      stages: Object.fromEntries([...stages].map(([name, window]) => [name, window.summary()])),
+    },
+  ]));
+}
@@ -0,0 +1,85 @@
+// Working-day arithmetic shared by the leave form and POST /api/leaves, so the
+// duration shown to the employee is the one that gets deducted.
+//
+// Dates are whole UTC days ('YYYY-MM-DD' parses to UTC midnight). Weekends and
+// public holidays are not counted. The holiday calendar is French public
+// holidays (NEXT_PUBLIC_HOLIDAY_CALENDAR=none disables it) plus any dates
+// listed in NEXT_PUBLIC_LEAVE_HOLIDAYS, and is built once per year and cached.
+
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+const CALENDAR = process.env.NEXT_PUBLIC_HOLIDAY_CALENDAR || 'fr';
+const EXTRA_HOLIDAYS = (process.env.NEXT_PUBLIC_LEAVE_HOLIDAYS || '')
+  .split(',')
+  .map((date) => date.trim())
+  .filter(Boolean);
+
+const holidaysByYear = new Map();
+
+const toKey = (date) => date.toISOString().slice(0, 10);
+
+// Gregorian Easter Sunday (anonymous algorithm)
+function easterSunday(year) {
+  const a = year % 19;
+  const b = Math.floor(year / 100);
+  const c = year % 100;
+  const d = Math.floor(b / 4);
+  const e = b % 4;
+  const f = Math.floor((b + 8) / 25);
+  const g = Math.floor((b - f + 1) / 3);
+  const h = (19 * a + b - d - g + 15) % 30;
+  const i = Math.floor(c / 4);
+  const k = c % 4;
+  const l = (32 + 2 * e + 2 * i - h - k) % 7;
+  const m = Math.floor((a + 11 * h + 22 * l) / 451);
+  const month = Math.floor((h + l - 7 * m + 114) / 31);
+  const day = ((h + l - 7 * m + 114) % 31) + 1;
+  return Date.UTC(year, month - 1, day);
+}
+
+function frenchHolidays(year) {
+  const easter = easterSunday(year);
+  return [
+    `${year}-01-01`, // Jour de l'an
+    toKey(new Date(easter + DAY_MS)), // Lundi de Pâques
+    `${year}-05-01`, // Fête du travail
+    `${year}-05-08`, // Victoire 1945
+    toKey(new Date(easter + 39 * DAY_MS)), // Ascension
+    toKey(new Date(easter + 50 * DAY_MS)), // Lundi de Pentecôte
+    `${year}-07-14`, // Fête nationale
+    `${year}-08-15`, // Assomption
+    `${year}-11-01`, // Toussaint
+    `${year}-11-11`, // Armistice
+    `${year}-12-25`, // Noël
+  ];
+}
+
+export function holidaysFor(year) {
+  let holidays = holidaysByYear.get(year);
+  if (!holidays) {
+    holidays = new Set([
+      ...(CALENDAR === 'fr' ? frenchHolidays(year) : []),
+      ...EXTRA_HOLIDAYS.filter((date) => date.startsWith(`${year}-`)),
+    ]);
+    holidaysByYear.set(year, holidays);
+  }
+  return holidays;
+}
+
+export function isWorkingDay(date) {
+  const weekday = date.getUTCDay();
+  return weekday !== 0 && weekday !== 6 && !holidaysFor(date.getUTCFullYear()).has(toKey(date));
+}
+
+// Working days from start to end, both included; 0 when end is before start
+export function countWorkingDays(start, end) {
+  const from = Date.UTC(start.getUTCFullYear(), start.getUTCMonth(), start.getUTCDate());
+  const to = Date.UTC(end.getUTCFullYear(), end.getUTCMonth(), end.getUTCDate());
+  let days = 0;
+  for (let time = from; time <= to; time += DAY_MS) {
+    if (isWorkingDay(new Date(time))) {
+      days += 1;
+    }
+  }
+  return days;
+}
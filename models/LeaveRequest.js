@@ -1,10 +1,12 @@
 import mongoose from 'mongoose';
+import { mongooseTiming } from '../lib/tracing.js';
 
 const LeaveRequestSchema = new mongoose.Schema({
   id: { type: String, required: true, unique: true },
   employeeUid: { type: String, required: true },
   employeeName: { type: String, required: true },
   employeeEmail: { type: String, required: true },
+  department: { type: String }, // employee's department when the request was made
   type: { 
     type: String, 
     enum: ['annual', 'sick', 'personal', 'maternity', 'paternity'], 
@@ -14,7 +16,13 @@ const LeaveRequestSchema = new mongoose.Schema({
   endDate: { type: Date, required: true },
   days: { type: Number, required: true },
   reason: { type: String },
-  attachment: { type: String }, // base64 encoded file
+  attachment: { type: String }, // legacy: base64 data URL stored inline
+  attachmentFile: { // reference into the GridFS 'attachments' bucket
+    fileId: { type: String },
+    filename: { type: String },
+    contentType: { type: String },
+    size: { type: Number },
+  },
   status: { 
     type: String, 
     enum: ['pending', 'approved', 'rejected'], 
@@ -22,7 +30,29 @@ const LeaveRequestSchema = new mongoose.Schema({
   },
   approvedBy: { type: String },
   approvedAt: { type: Date },
+  decisionId: { type: String }, // approval call that moved this request out of pending
   rejectionReason: { type: String },
 }, { timestamps: true });
 
+// Access paths used by app/api/[[...path]]/route.js
+// (checked by scripts/explain-leave-queries.js):
+// an employee's leaves, newest first - history pages and dashboard
+LeaveRequestSchema.index({ employeeUid: 1, createdAt: -1, id: -1 });
+// an employee's count per status - dashboard - and overlapping pending or
+// approved requests when creating a new one
+LeaveRequestSchema.index({ employeeUid: 1, status: 1, endDate: 1, startDate: 1 });
+// the approval queue pages, newest first, and the org-wide pending count
+LeaveRequestSchema.index({ status: 1, createdAt: -1, id: -1 });
+// team calendar: leaves overlapping [from, to] are endDate >= from (index range)
+// and startDate <= to (checked on index keys, no document fetch)
+LeaveRequestSchema.index({ department: 1, status: 1, endDate: 1, startDate: 1 });
+LeaveRequestSchema.index({ status: 1, endDate: 1, startDate: 1 });
+// conditional GETs: latest change in an employee's requests / in the queue
+LeaveRequestSchema.index({ employeeUid: 1, updatedAt: -1 });
+LeaveRequestSchema.index({ status: 1, updatedAt: -1 });
+// manager dashboard: decisions in the approval-latency window
+LeaveRequestSchema.index({ approvedAt: 1 });
+
+LeaveRequestSchema.plugin(mongooseTiming);
+
 export default mongoose.models.LeaveRequest || mongoose.model('LeaveRequest', LeaveRequestSchema);
\ No newline at end of file
@@ -0,0 +1,18 @@
+import mongoose from 'mongoose';
+import { mongooseTiming } from '../lib/tracing.js';
+
+// One document per employee and calendar year (of the leave's start date),
+// maintained on write by lib/leaveSummary.js:
+// types.<leave type>.<status> = { requests, days }
+const LeaveSummarySchema = new mongoose.Schema({
+  employeeUid: { type: String, required: true },
+  year: { type: Number, required: true },
+  types: { type: mongoose.Schema.Types.Mixed, default: {} },
+  rebuiltAt: { type: Date }, // set by the last full recomputation
+}, { timestamps: true, minimize: false });
+
+LeaveSummarySchema.index({ employeeUid: 1, year: 1 }, { unique: true });
+
+LeaveSummarySchema.plugin(mongooseTiming);
+
+export default mongoose.models.LeaveSummary || mongoose.model('LeaveSummary', LeaveSummarySchema);
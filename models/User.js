@@ -1,4 +1,5 @@
 import mongoose from 'mongoose';
+import { mongooseTiming } from '../lib/tracing.js';
 
 const UserSchema = new mongoose.Schema({
   uid: { type: String, required: true, unique: true },
@@ -22,4 +23,6 @@ const UserSchema = new mongoose.Schema({
   },
 }, { timestamps: true });
 
+UserSchema.plugin(mongooseTiming);
+
 export default mongoose.models.User || mongoose.model('User', UserSchema);
\ No newline at end of file
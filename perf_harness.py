@@ -0,0 +1,767 @@
+#!/usr/bin/env python3
+"""
+Load Testing Harness for Breakly Application
+Drives every route of the catch-all API with concurrent workers or a target
+request rate and reports per-endpoint latency percentiles, throughput and error rate.
+
+The target server must run locally with FIREBASE_AUTH_STUB=true and a loopback
+NEXT_PUBLIC_BASE_URL (e.g. http://127.0.0.1:3100) so that "stub:<uid>:<email>"
+tokens are accepted without any network access.
+"""
+
+import itertools
+import json
+import os
+import random
+import shlex
+import signal
+import socket
+import subprocess
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from pymongo import MongoClient
+except ImportError:  # Manager promotion is skipped without pymongo
+    MongoClient = None
+
+LOAD_BASE_URL = os.getenv('LOAD_BASE_URL', 'http://localhost:3000')
+MONGO_URL = os.getenv('MONGO_URL', 'mongodb://localhost:27017')
+DB_NAME = os.getenv('DB_NAME', 'breakly_db')
+# Sent as X-Metrics-Token; must match the server's METRICS_TOKEN
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# (name, method, path, weight) - weights approximate real page traffic
+ENDPOINTS = [
+    ("GET /user", "GET", "/user", 3),
+    ("GET /leaves", "GET", "/leaves", 3),
+    ("GET /leaves/pending", "GET", "/leaves/pending", 1),
+    ("GET /dashboard/stats", "GET", "/dashboard/stats", 3),
+    ("POST /leaves", "POST", "/leaves", 1),
+    ("PUT /leaves/approve", "PUT", "/leaves/approve", 1),
+]
+
+# The server refuses overlapping requests and annual/personal leave beyond the
+# balance; sustained load uses types without a balance check
+LEAVE_TYPES = ['sick', 'maternity', 'paternity']
+
+
+def stub_token(uid, email=None):
+    """Build a token accepted by the server's stub verifier"""
+    return f"stub:{uid}:{email or f'{uid}@breakly.test'}"
+
+
+def percentile(values, pct):
+    """Linear-interpolated percentile of an unsorted list (pct in 0-100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def parse_server_timing(header):
+    """Parse a Server-Timing header into {metric name: duration ms}"""
+    timings = {}
+    for entry in (header or '').split(','):
+        name, *params = [part.strip() for part in entry.split(';')]
+        if not name:
+            continue
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip() == 'dur':
+                try:
+                    timings[name] = float(value)
+                except ValueError:
+                    pass
+    return timings
+
+
+def fetch_route_timings(base_url=LOAD_BASE_URL, session=None):
+    """Scrape the server's rolling per-route stage timings from GET /api/metrics"""
+    response = (session or requests).get(f"{base_url}/api/metrics", headers={'X-Metrics-Token': METRICS_TOKEN},
+                                         timeout=10)
+    response.raise_for_status()
+    return response.json().get('routes', {})
+
+
+def budget_violations(route_timings, max_ms, percentile_key='p95', routes=None):
+    """List '<route> <pct> <ms> > <budget>' for every route whose total exceeds max_ms"""
+    violations = []
+    for route, timing in sorted(route_timings.items()):
+        if routes and route not in routes:
+            continue
+        if timing.get(percentile_key, 0) > max_ms:
+            violations.append(f"{route} {percentile_key} {timing[percentile_key]:.1f}ms > {max_ms:.1f}ms")
+    return violations
+
+
+class LatencyStats:
+    """Thread-safe latency and error recorder, bucketed by endpoint name"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.server_stages = {}
+        self.started = None
+        self.finished = None
+
+    def record(self, name, latency_ms, ok, server_timing=None):
+        with self._lock:
+            self.latencies.setdefault(name, []).append(latency_ms)
+            if not ok:
+                self.errors[name] = self.errors.get(name, 0) + 1
+            for stage, duration in (server_timing or {}).items():
+                self.server_stages.setdefault(name, {}).setdefault(stage, []).append(duration)
+
+
+    def summary(self):
+        """
+        Per-endpoint p50/p95/p99, throughput and error rate, plus an 'ALL' row.
+        Endpoint rows also carry 'server': the p50/p95 of each Server-Timing stage.
+        """
+        elapsed = max((self.finished or time.perf_counter()) - (self.started or 0), 1e-9)
+        rows = {}
+        all_latencies = []
+        all_errors = 0
+        for name, values in self.latencies.items():
+            errors = self.errors.get(name, 0)
+            rows[name] = self._row(values, errors, elapsed)
+            rows[name]['server'] = {
+                stage: {'p50': percentile(durations, 50), 'p95': percentile(durations, 95)}
+                for stage, durations in self.server_stages.get(name, {}).items()
+            }
+            all_latencies.extend(values)
+            all_errors += errors
+        rows['ALL'] = self._row(all_latencies, all_errors, elapsed)
+        return rows
+
+    @staticmethod
+    def _row(values, errors, elapsed):
+        count = len(values)
+        return {
+            'count': count,
+            'errors': errors,
+            'error_rate': errors / count if count else 0.0,
+            'throughput': count / elapsed,
+            'p50': percentile(values, 50),
+            'p95': percentile(values, 95),
+            'p99': percentile(values, 99),
+            'max': max(values) if values else 0.0,
+        }
+
+
+class LoadScenario:
+    """Seeded users and request builders for one load run"""
+
+    def __init__(self, base_url=LOAD_BASE_URL, employees=20, seed_leaves=200):
+        self.api_base = f"{base_url}/api"
+        self.employee_count = employees
+        self.seed_leaves = seed_leaves
+        self.run_id = uuid.uuid4().hex[:8]
+        self.employees = []
+        self.manager = None
+        self.pending_ids = deque()
+        self._leave_slots = itertools.count()
+        self._local = threading.local()
+
+    def session(self):
+        """Per-thread keep-alive session so each worker reuses its connection"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._local.session = session
+        return session
+
+    def _register(self, uid, name):
+        token = stub_token(uid)
+        response = self.session().post(f"{self.api_base}/auth/register", json={
+            "idToken": token,
+            "displayName": name,
+            "department": random.choice(['Engineering', 'Marketing', 'Sales']),
+        })
+        if response.status_code >= 400:
+            # Already registered on a previous run: refresh lastLogin instead
+            self.session().post(f"{self.api_base}/auth/login", json={"idToken": token})
+        return token
+
+    def setup(self):
+        """Register employees and a manager, then seed pending leave requests"""
+        print(f"🌱 Seeding {self.employee_count} employees and {self.seed_leaves} leave requests")
+        for i in range(self.employee_count):
+            uid = f"load-{self.run_id}-emp{i}"
+            self.employees.append(self._register(uid, f"Load Employee {i}"))
+
+        manager_uid = f"load-{self.run_id}-mgr"
+        self.manager = self._register(manager_uid, "Load Manager")
+        if not promote_users([manager_uid], 'Manager'):
+            print("⚠️  pymongo unavailable: manager endpoints will answer 403 and count as errors")
+
+        for _ in range(self.seed_leaves):
+            self.execute("POST", "/leaves")
+
+    def build(self, method, path):
+        """
+        Return (token, json body) for one request against an endpoint, or None
+        for an approval while no created request is waiting for a decision
+        """
+        if path in ('/leaves/pending', '/leaves/approve'):
+            token = self.manager
+        else:
+            token = random.choice(self.employees)
+
+        body = None
+        if method == "POST" and path == "/leaves":
+            # Each employee gets consecutive weeks, so requests never overlap
+            slot = next(self._leave_slots)
+            token = self.employees[slot % len(self.employees)]
+            today = date.today()
+            monday = today + timedelta(days=7 - today.weekday(), weeks=slot // len(self.employees))
+            body = {
+                "type": random.choice(LEAVE_TYPES),
+                "startDate": monday.isoformat(),
+                "endDate": (monday + timedelta(days=random.randint(1, 4))).isoformat(),
+                "reason": "Load test",
+            }
+        elif method == "PUT" and path == "/leaves/approve":
+            try:
+                leave_id = self.pending_ids.popleft()
+            except IndexError:
+                # An unknown id answers 404 and would count as an error
+                return None
+            body = {"leaveId": leave_id, "action": random.choice(['approve', 'reject']),
+                    "rejectionReason": "Load test"}
+        return token, body
+
+    def execute(self, method, path):
+        """Send one request; returns the response, None if skipped (or raises on connection errors)"""
+        request = self.build(method, path)
+        if request is None:
+            return None
+        token, body = request
+        response = self.session().request(
+            method, f"{self.api_base}{path}", json=body,
+            headers={'Authorization': f"Bearer {token}"}, timeout=30,
+        )
+        if method == "POST" and path == "/leaves" and response.ok:
+            self.pending_ids.append(response.json().get('id'))
+        return response
+
+
+def _weighted_cycle(endpoints):
+    cycle = [endpoint for endpoint in endpoints for _ in range(endpoint[3])]
+    random.shuffle(cycle)
+    return cycle
+
+
+def run_load(scenario, concurrency=8, duration=10.0, rate=None, endpoints=None):
+    """
+    Drive the scenario for `duration` seconds.
+
+    Closed loop (rate=None): `concurrency` workers each send back-to-back requests.
+    Open loop (rate=N): requests are scheduled N per second across the workers and
+    latency is measured from the scheduled start, so queueing delay is not hidden.
+    """
+    cycle = _weighted_cycle(endpoints or ENDPOINTS)
+    stats = LatencyStats()
+    slot_lock = threading.Lock()
+    next_slot = [0]
+
+    stats.started = time.perf_counter()
+    deadline = stats.started + duration
+
+    def worker(offset):
+        position = offset
+        while True:
+            if rate:
+                with slot_lock:
+                    slot = next_slot[0]
+                    next_slot[0] += 1
+                scheduled = stats.started + slot / rate
+                if scheduled >= deadline:
+                    return
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                begin = scheduled
+            else:
+                begin = time.perf_counter()
+                if begin >= deadline:
+                    return
+
+            name, method, path, _ = cycle[position % len(cycle)]
+            position += 1
+            server_timing = None
+            try:
+                response = scenario.execute(method, path)
+                if response is None:
+                    continue
+                ok = response.status_code < 400
+                server_timing = parse_server_timing(response.headers.get('Server-Timing'))
+            except requests.RequestException:
+                ok = False
+            stats.record(name, (time.perf_counter() - begin) * 1000, ok, server_timing)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker, i) for i in range(concurrency)]:
+            future.result()
+    stats.finished = time.perf_counter()
+    return stats.summary()
+
+
+def print_report(summary, title="Load test results"):
+    print(f"\n📊 {title}")
+    print(f"{'Endpoint':<24}{'Count':>8}{'Err %':>8}{'Req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name, row in sorted(summary.items(), key=lambda item: item[0] == 'ALL'):
+        print(f"{name:<24}{row['count']:>8}{row['error_rate'] * 100:>8.1f}{row['throughput']:>9.1f}"
+              f"{row['p50']:>9.1f}{row['p95']:>9.1f}{row['p99']:>9.1f}")
+
+
+def print_server_breakdown(route_timings, title="Server-side stage timings (rolling window)"):
+    """Print the per-route stage table scraped from GET /api/metrics"""
+    print(f"\n🔬 {title}")
+    print(f"{'Route / stage':<44}{'Count':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for route, timing in sorted(route_timings.items()):
+        print(f"{route:<44}{timing['count']:>8}{timing['p50']:>9.1f}{timing['p95']:>9.1f}{timing['p99']:>9.1f}")
+        for stage, stage_timing in sorted(timing.get('stages', {}).items()):
+            print(f"{'  ' + stage:<44}{stage_timing['count']:>8}{stage_timing['p50']:>9.1f}"
+                  f"{stage_timing['p95']:>9.1f}{stage_timing['p99']:>9.1f}")
+
+
+def find_saturation(levels, min_gain=0.10):
+    """
+    Given [(concurrency, summary)] in increasing order, return the first concurrency
+    where throughput grew by less than `min_gain` over the previous level.
+    """
+    for (_, previous), (concurrency, current) in zip(levels, levels[1:]):
+        before = previous['ALL']['throughput']
+        if before and (current['ALL']['throughput'] - before) / before < min_gain:
+            return concurrency
+    return None
+
+
+def sweep(scenario, levels=(1, 2, 4, 8, 16, 32, 64), duration=10.0, endpoints=None):
+    """Step up the worker count to find where the handler plus Mongo stops scaling"""
+    results = []
+    for concurrency in levels:
+        summary = run_load(scenario, concurrency=concurrency, duration=duration, endpoints=endpoints)
+        overall = summary['ALL']
+        print(f"   {concurrency:>3} workers: {overall['throughput']:8.1f} req/s, "
+              f"p99 {overall['p99']:8.1f}ms, errors {overall['error_rate'] * 100:.1f}%")
+        results.append((concurrency, summary))
+
+    knee = find_saturation(results)
+    if knee:
+        print(f"📉 Throughput stops scaling at ~{knee} concurrent workers")
+    else:
+        print("📈 Throughput still scaling at the highest level tested")
+    return results
+
+
+def _next_weekday(days_ahead):
+    day = date.today() + timedelta(days=days_ahead)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+
+def approval_race(base_url=LOAD_BASE_URL, leaves=10, racers=8, managers=2, promote=None):
+    """
+    Stress concurrent approval: every leave request is approved by `racers`
+    simultaneous PUT /leaves/approve calls spread over `managers` managers.
+    Returns the employee's expected and actual balance after the race plus a
+    status-code histogram; the two balances differ when a leave was deducted twice.
+    """
+    api_base = f"{base_url}/api"
+    run_id = uuid.uuid4().hex[:8]
+    session = requests.Session()
+
+    def register(uid, name):
+        token = stub_token(uid)
+        session.post(f"{api_base}/auth/register", json={"idToken": token, "displayName": name}).raise_for_status()
+        return token
+
+    employee = register(f"race-{run_id}-emp", "Race Employee")
+    manager_uids = [f"race-{run_id}-mgr{i}" for i in range(managers)]
+    manager_tokens = [register(uid, f"Race Manager {i}") for i, uid in enumerate(manager_uids)]
+    if not (promote or promote_users)(manager_uids, 'Manager'):
+        raise RuntimeError("pymongo is required to promote the race managers")
+
+    def annual_balance():
+        response = session.get(f"{api_base}/user", headers={'Authorization': f"Bearer {employee}"})
+        response.raise_for_status()
+        return response.json()['leaveBalance']['annual']
+
+    before = annual_balance()
+    leave_ids = []
+    deducted = 0
+    for i in range(leaves):
+        day = _next_weekday(30 + i * 7).isoformat()
+        response = session.post(f"{api_base}/leaves", headers={'Authorization': f"Bearer {employee}"}, json={
+            "type": "annual", "startDate": day, "endDate": day, "reason": "Approval race",
+        })
+        response.raise_for_status()
+        leave_ids.append(response.json()['id'])
+        deducted += response.json()['days']
+
+    local = threading.local()
+    statuses = {}
+    lock = threading.Lock()
+
+    def approve(leave_id, token, barrier):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        barrier.wait()
+        response = local.session.put(f"{api_base}/leaves/approve", headers={'Authorization': f"Bearer {token}"},
+                                     json={"leaveId": leave_id, "action": "approve"}, timeout=30)
+        with lock:
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    with ThreadPoolExecutor(max_workers=racers) as pool:
+        for leave_id in leave_ids:
+            barrier = threading.Barrier(racers)
+            futures = [pool.submit(approve, leave_id, manager_tokens[i % managers], barrier) for i in range(racers)]
+            for future in futures:
+                future.result()
+
+    return {'expected': before - deducted, 'actual': annual_balance(), 'statuses': statuses}
+
+
+def promote_users(uids, role, db_name=None):
+    """Set the role of seeded users directly in Mongo (register always creates Employees)"""
+    if MongoClient is None:
+        return False
+    client = MongoClient(MONGO_URL)
+    try:
+        client[db_name or DB_NAME].users.update_many({'uid': {'$in': list(uids)}}, {'$set': {'role': role}})
+    finally:
+        client.close()
+    return True
+
+
+# --- Traffic capture and replay -------------------------------------------
+#
+# A trace is a JSONL file of abstract operations, one per line:
+#   {"t": 1.234, "op": "POST /leaves", "actor": "emp3", "leave": {"ref": 12, "week": 2, ...}}
+# Actors, leave dates and leave ids are symbolic so the same trace replays on
+# any day against a fresh database: actors become stub-token users unique to the
+# replay, weeks are counted from next Monday, and "decision": {"ref": n} points
+# at the id returned by the n-th created leave. Entries flagged "seed" build the
+# starting data set and are not measured.
+
+TRAFFIC_MIX = [("POST /auth/login", "POST", "/auth/login", 1)] + ENDPOINTS
+DEPARTMENTS = ['Engineering', 'Marketing', 'Sales']
+BENCH_DB_NAME = os.getenv('BENCH_DB_NAME', 'breakly_bench')
+BENCH_SERVER_CMD = os.getenv('BENCH_SERVER_CMD', 'yarn start')
+# local_server() listens here, away from a dev server on :3000 (`next start` reads PORT)
+BENCH_PORT = int(os.getenv('BENCH_PORT', '3100'))
+
+
+def record_traffic(path, requests_count=600, rate=40.0, employees=20, managers=2, seed_leaves=100, seed=0):
+    """
+    Write a synthetic trace of the weighted TRAFFIC_MIX to `path`: Poisson
+    arrivals at `rate` req/s after a seed phase registering every actor and
+    creating `seed_leaves` pending requests. The same seed gives the same file.
+    """
+    rng = random.Random(seed)
+    employee_actors = [f"emp{i}" for i in range(employees)]
+    manager_actors = [f"mgr{i}" for i in range(managers)]
+    entries = []
+
+    for actor in employee_actors + manager_actors:
+        entries.append({"t": 0.0, "op": "POST /auth/register", "actor": actor, "seed": True,
+                        "role": "Manager" if actor in manager_actors else "Employee",
+                        "department": rng.choice(DEPARTMENTS)})
+
+    refs = itertools.count()
+    undecided = deque()
+
+    def create():
+        # Each employee gets consecutive weeks, as in LoadScenario.build
+        ref = next(refs)
+        undecided.append(ref)
+        return employee_actors[ref % employees], {
+            "ref": ref,
+            "week": ref // employees,
+            "length": rng.randint(1, 4),
+            "type": rng.choice(LEAVE_TYPES),
+        }
+
+    for _ in range(seed_leaves):
+        actor, leave = create()
+        entries.append({"t": 0.0, "op": "POST /leaves", "actor": actor, "seed": True, "leave": leave})
+
+    names = [endpoint[0] for endpoint in TRAFFIC_MIX]
+    weights = [endpoint[3] for endpoint in TRAFFIC_MIX]
+    t = 0.0
+    for _ in range(requests_count):
+        t += rng.expovariate(rate)
+        op = rng.choices(names, weights)[0]
+        if op == "PUT /leaves/approve" and not undecided:
+            op = "GET /leaves/pending"
+        entry = {"t": round(t, 3), "op": op}
+
+        if op == "POST /leaves":
+            entry["actor"], entry["leave"] = create()
+        elif op == "PUT /leaves/approve":
+            entry["actor"] = rng.choice(manager_actors)
+            entry["decision"] = {"ref": undecided.popleft(), "action": rng.choice(['approve', 'reject'])}
+        elif op == "GET /leaves/pending":
+            entry["actor"] = rng.choice(manager_actors)
+        else:
+            entry["actor"] = rng.choice(employee_actors + manager_actors)
+        entries.append(entry)
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as trace:
+        for entry in entries:
+            trace.write(json.dumps(entry) + '\n')
+    return entries
+
+
+def load_traffic(path):
+    with open(path) as trace:
+        return [json.loads(line) for line in trace if line.strip()]
+
+
+class TrafficReplay:
+    """Materializes trace entries into requests against one server"""
+
+    def __init__(self, base_url, entries, db_name=None, promote=None):
+        self.api_base = f"{base_url}/api"
+        self.entries = entries
+        self.db_name = db_name
+        self.promote = promote or promote_users
+        self.run_id = uuid.uuid4().hex[:8]
+        self.first_monday = date.today() + timedelta(days=7 - date.today().weekday())
+        self.leave_ids = {}
+        self.created = {
+            entry["leave"]["ref"]: threading.Event() for entry in entries if "leave" in entry
+        }
+        self._local = threading.local()
+
+    def session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def token(self, actor):
+        return stub_token(f"replay-{self.run_id}-{actor}")
+
+    def execute(self, entry):
+        """Send one entry; returns the response (or raises on connection errors)"""
+        method, path = entry["op"].split(' ', 1)
+        token = self.token(entry["actor"])
+        headers = {'Authorization': f"Bearer {token}"}
+        body = None
+
+        if path == "/auth/register":
+            headers, body = {}, {"idToken": token, "displayName": entry["actor"], "department": entry.get("department")}
+        elif path == "/auth/login":
+            headers, body = {}, {"idToken": token}
+        elif "leave" in entry:
+            leave = entry["leave"]
+            start = self.first_monday + timedelta(weeks=leave["week"])
+            body = {"type": leave["type"], "startDate": start.isoformat(),
+                    "endDate": (start + timedelta(days=leave["length"])).isoformat(), "reason": "Replay"}
+        elif "decision" in entry:
+            ref = entry["decision"]["ref"]
+            self.created[ref].wait(timeout=30)
+            body = {"leaveId": self.leave_ids.get(ref) or str(uuid.uuid4()),
+                    "action": entry["decision"]["action"], "rejectionReason": "Replay"}
+
+        try:
+            response = self.session().request(method, f"{self.api_base}{path}", json=body, headers=headers, timeout=30)
+            if "leave" in entry and response.ok:
+                self.leave_ids[entry["leave"]["ref"]] = response.json().get('id')
+            if path == "/auth/register" and response.ok and entry.get("role", "Employee") != "Employee":
+                uid = f"replay-{self.run_id}-{entry['actor']}"
+                if not self.promote([uid], entry["role"], db_name=self.db_name):
+                    print("⚠️  pymongo unavailable: manager entries will answer 403 and count as errors")
+            return response
+        finally:
+            if "leave" in entry:
+                self.created[entry["leave"]["ref"]].set()
+
+    def seed(self):
+        """Replay the seed entries unmeasured: registrations first, then the rest"""
+        seed_entries = [entry for entry in self.entries if entry.get("seed")]
+        for entry in seed_entries:
+            if entry["op"] == "POST /auth/register":
+                self.execute(entry)
+        for entry in seed_entries:
+            if entry["op"] != "POST /auth/register":
+                self.execute(entry)
+
+    def run(self, concurrency=8, speed=0.0):
+        """
+        Replay the measured entries in order. speed=0 sends them back to back
+        from `concurrency` workers (peak throughput); speed=N keeps the
+        recorded arrival times N times faster, measuring latency from the
+        scheduled start as run_load does in open loop.
+        """
+        measured = [entry for entry in self.entries if not entry.get("seed")]
+        stats = LatencyStats()
+        position = itertools.count()
+
+        stats.started = time.perf_counter()
+
+        def worker():
+            while True:
+                index = next(position)
+                if index >= len(measured):
+                    return
+                entry = measured[index]
+                if speed:
+                    begin = stats.started + entry["t"] / speed
+                    delay = begin - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                else:
+                    begin = time.perf_counter()
+
+                server_timing = None
+                try:
+                    response = self.execute(entry)
+                    ok = response.status_code < 400
+                    server_timing = parse_server_timing(response.headers.get('Server-Timing'))
+                except requests.RequestException:
+                    ok = False
+                stats.record(entry["op"], (time.perf_counter() - begin) * 1000, ok, server_timing)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for future in [pool.submit(worker) for _ in range(concurrency)]:
+                future.result()
+        stats.finished = time.perf_counter()
+        return stats.summary()
+
+
+def replay_traffic(base_url, entries, concurrency=8, speed=0.0, db_name=None, promote=None):
+    """Seed, then replay a trace against base_url; returns the LatencyStats summary"""
+    replay = TrafficReplay(base_url, entries, db_name=db_name, promote=promote)
+    replay.seed()
+    return replay.run(concurrency=concurrency, speed=speed)
+
+
+def compare_to_baseline(summary, baseline, max_regression=0.20, min_delta_ms=5.0):
+    """
+    List regressions of `summary` against a baseline summary: an endpoint p95
+    more than `max_regression` slower (and by at least `min_delta_ms`, below
+    which timings are noise), an error rate up by more than a point, or overall
+    throughput more than `max_regression` lower.
+    """
+    regressions = []
+    for name, before in sorted(baseline.items()):
+        after = summary.get(name)
+        if not after:
+            continue
+        if after['p95'] > before['p95'] * (1 + max_regression) and after['p95'] - before['p95'] >= min_delta_ms:
+            regressions.append(f"{name} p95 {before['p95']:.1f}ms -> {after['p95']:.1f}ms")
+        if after['error_rate'] > before['error_rate'] + 0.01:
+            regressions.append(f"{name} error rate {before['error_rate'] * 100:.1f}% -> {after['error_rate'] * 100:.1f}%")
+    if 'ALL' in baseline and 'ALL' in summary:
+        before, after = baseline['ALL']['throughput'], summary['ALL']['throughput']
+        if after < before * (1 - max_regression):
+            regressions.append(f"ALL throughput {before:.1f} -> {after:.1f} req/s ({(after / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def save_baseline(path, summary, **settings):
+    """Store a replay summary with the settings it was measured under"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as baseline:
+        json.dump({"settings": settings, "summary": summary}, baseline, indent=2, sort_keys=True)
+        baseline.write('\n')
+
+
+def load_baseline(path):
+    """Return (settings, summary) from save_baseline, or (None, None) if missing"""
+    if not os.path.exists(path):
+        return None, None
+    with open(path) as baseline:
+        data = json.load(baseline)
+    return data.get("settings", {}), data["summary"]
+
+
+def reset_database(db_name=BENCH_DB_NAME):
+    """Drop the benchmark database so every replay starts from the same data"""
+    if MongoClient is None:
+        return False
+    client = MongoClient(MONGO_URL)
+    try:
+        client.drop_database(db_name)
+    finally:
+        client.close()
+    return True
+
+
+def port_in_use(port, host='127.0.0.1'):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+        probe.settimeout(1)
+        return probe.connect_ex((host, port)) == 0
+
+
+@contextmanager
+def local_server(port=BENCH_PORT, command=BENCH_SERVER_CMD, db_name=BENCH_DB_NAME, timeout=120.0):
+    """
+    Start the app (built beforehand for `yarn start`) on its own port with the
+    stub token verifier and its own database, wait until the API answers and
+    yield its base URL; the server is stopped on exit. Refuses to start when
+    the port is taken, so a dev server already running there is never
+    mistaken for this one.
+    """
+    if port_in_use(port):
+        raise RuntimeError(f"Port {port} is already in use: stop that server or set BENCH_PORT")
+
+    base_url = f"http://127.0.0.1:{port}"
+    env = {
+        **os.environ,
+        'PORT': str(port),
+        'NEXT_PUBLIC_BASE_URL': base_url,
+        'FIREBASE_AUTH_STUB': 'true',
+        'DB_NAME': db_name,
+        'MONGO_EAGER_CONNECT': 'true',
+        'MONGO_CREATE_INDEXES': 'true',
+    }
+    process = subprocess.Popen(shlex.split(command), env=env, start_new_session=True,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"'{command}' exited with status {process.returncode}")
+            try:
+                if requests.get(f"{base_url}/api", timeout=2).ok:
+                    break
+            except requests.RequestException:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{base_url} did not answer within {timeout:.0f}s")
+            time.sleep(0.5)
+        # The answer must have come from the process started here
+        if process.poll() is not None:
+            raise RuntimeError(f"'{command}' exited with status {process.returncode}")
+        yield base_url
+    finally:
+        # The package manager forks the server: stop the whole process group
+        if process.poll() is None:
+            os.killpg(process.pid, signal.SIGTERM)
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                os.killpg(process.pid, signal.SIGKILL)
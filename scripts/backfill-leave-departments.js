@@ -0,0 +1,77 @@
+// One-off backfill: copy each employee's department onto their leave requests
+// created before LeaveRequest.department existed. The team calendar filters on
+// that field, so without it those requests never show up in a department.
+//
+// Only requests with no department are touched, and they get the employee's
+// current department - the one they had at the time is not recorded anywhere.
+// Safe to run again.
+//
+//   yarn db:backfill-departments [--dry-run]
+
+import mongoose from 'mongoose';
+import User from '../models/User.js';
+import LeaveRequest from '../models/LeaveRequest.js';
+
+const DRY_RUN = process.argv.includes('--dry-run');
+const BATCH_SIZE = 500;
+
+async function main() {
+  if (!process.env.MONGO_URL) {
+    throw new Error('Set MONGO_URL');
+  }
+  await mongoose.connect(process.env.MONGO_URL, {
+    dbName: process.env.DB_NAME || 'breakly_db',
+    autoIndex: false,
+  });
+
+  try {
+    const missing = { department: null }; // unset or null
+    console.log(`${await LeaveRequest.countDocuments(missing)} leave requests without a department`);
+
+    let matched = 0;
+    let modified = 0;
+    let batch = [];
+    const flush = async () => {
+      if (!batch.length) {
+        return;
+      }
+      if (DRY_RUN) {
+        const counts = await Promise.all(batch.map(({ updateMany }) => LeaveRequest.countDocuments(updateMany.filter)));
+        matched += counts.reduce((sum, count) => sum + count, 0);
+      } else {
+        const result = await LeaveRequest.bulkWrite(batch, { ordered: false });
+        matched += result.matchedCount;
+        modified += result.modifiedCount;
+      }
+      batch = [];
+    };
+
+    const users = User.find({ department: { $nin: [null, ''] } }, 'uid department').lean().cursor();
+    for await (const user of users) {
+      batch.push({
+        updateMany: {
+          filter: { employeeUid: user.uid, ...missing },
+          update: { $set: { department: user.department } },
+        },
+      });
+      if (batch.length >= BATCH_SIZE) {
+        await flush();
+      }
+    }
+    await flush();
+
+    if (DRY_RUN) {
+      console.log(`Dry run: ${matched} leave requests would get a department`);
+    } else {
+      console.log(`${modified} of ${matched} leave requests updated`);
+      console.log(`${await LeaveRequest.countDocuments(missing)} left without one (employees with no department)`);
+    }
+  } finally {
+    await mongoose.disconnect();
+  }
+}
+
+main().catch((error) => {
+  console.error(error);
+  process.exit(1);
+});
@@ -0,0 +1,111 @@
+// Serialization micro-benchmark for the API read paths.
+//
+// Builds N leave requests and user profiles shaped like stored documents and
+// compares, per response of N rows:
+//   hydrated  - Mongoose documents (what find() without .lean() returns)
+//               serialized through toJSON, as NextResponse.json() did before
+//   lean      - the fixed shape projected by MongoDB (LEAVE_PROJECTION /
+//               USER_PROJECTION), serialized as is
+//   lean+dto  - raw driver objects mapped in JS by toLeaveDTO / toUserDTO
+//               (create and approve responses)
+// reporting CPU time per response and payload bytes. No database needed.
+//
+//   yarn bench:serialization [N] [--iterations=K]
+
+import mongoose from 'mongoose';
+import LeaveRequest from '../models/LeaveRequest.js';
+import User from '../models/User.js';
+import { LEAVE_FIELDS, USER_FIELDS, toLeaveDTO, toUserDTO } from '../lib/serializers.js';
+
+const N = parseInt(process.argv.find((arg) => /^\d+$/.test(arg)) || '1000', 10);
+const ITERATIONS = parseInt((process.argv.find((arg) => arg.startsWith('--iterations=')) || '=50').split('=')[1], 10);
+const TYPES = ['annual', 'sick', 'personal'];
+const STATUSES = ['approved', 'rejected', 'pending'];
+
+function rawLeave(i) {
+  const createdAt = new Date(Date.UTC(2024, 0, 1) + i * 60 * 60 * 1000);
+  const startDate = new Date(createdAt.getTime() + 14 * 24 * 60 * 60 * 1000);
+  const status = STATUSES[i % STATUSES.length];
+  return {
+    _id: new mongoose.Types.ObjectId(),
+    id: `bench-${i}`,
+    employeeUid: `bench-emp-${i % 50}`,
+    employeeName: `Employee ${i % 50}`,
+    employeeEmail: `bench-emp-${i % 50}@breakly.test`,
+    department: 'Engineering',
+    type: TYPES[i % TYPES.length],
+    startDate,
+    endDate: new Date(startDate.getTime() + 2 * 24 * 60 * 60 * 1000),
+    days: 3,
+    reason: 'Vacances',
+    status,
+    ...(status !== 'pending' && { approvedBy: 'bench-mgr', approvedAt: createdAt, decisionId: `decision-${i}` }),
+    ...(i % 10 === 0 && {
+      attachmentFile: { fileId: new mongoose.Types.ObjectId().toString(), filename: 'doc.pdf', contentType: 'application/pdf', size: 1024 },
+    }),
+    createdAt,
+    updatedAt: createdAt,
+    __v: 0,
+  };
+}
+
+function rawUser(i) {
+  const createdAt = new Date(Date.UTC(2023, 0, 1) + i * 60 * 1000);
+  return {
+    _id: new mongoose.Types.ObjectId(),
+    uid: `bench-user-${i}`,
+    email: `bench-user-${i}@breakly.test`,
+    displayName: `User ${i}`,
+    role: 'Employee',
+    department: 'Engineering',
+    lastLogin: createdAt,
+    leaveBalance: { annual: 25, sick: 5, personal: 3 },
+    createdAt,
+    updatedAt: createdAt,
+    __v: 0,
+  };
+}
+
+// What MongoDB returns for a LEAVE_PROJECTION / USER_PROJECTION read
+const projected = (raw, fields, extra = {}) => ({
+  ...Object.fromEntries(fields.map((field) => [field, raw[field] ?? null])),
+  ...extra,
+});
+
+function measure(label, run) {
+  run(); // warm up
+  const cpuBefore = process.cpuUsage();
+  let bytes = 0;
+  for (let i = 0; i < ITERATIONS; i++) {
+    bytes = Buffer.byteLength(run());
+  }
+  const { user, system } = process.cpuUsage(cpuBefore);
+  return { label, cpuMs: (user + system) / 1000 / ITERATIONS, bytes };
+}
+
+function report(title, rows) {
+  const [baseline] = rows;
+  console.log(`\n${title} (${N} rows, ${ITERATIONS} iterations)`);
+  for (const { label, cpuMs, bytes } of rows) {
+    const cpuGain = label === baseline.label ? '' : `  cpu ${((1 - cpuMs / baseline.cpuMs) * 100).toFixed(0)}% less`;
+    const sizeGain = label === baseline.label ? '' : `, ${((1 - bytes / baseline.bytes) * 100).toFixed(0)}% smaller`;
+    console.log(`  ${label.padEnd(10)} ${cpuMs.toFixed(2).padStart(8)} ms/response  ${String(bytes).padStart(9)} bytes${cpuGain}${sizeGain}`);
+  }
+}
+
+const leaves = Array.from({ length: N }, (_, i) => rawLeave(i));
+const users = Array.from({ length: N }, (_, i) => rawUser(i));
+const projectedLeaves = leaves.map((raw) => projected(raw, LEAVE_FIELDS, { hasAttachment: Boolean(raw.attachmentFile) }));
+const projectedUsers = users.map((raw) => projected(raw, USER_FIELDS));
+
+report('GET /leaves, /leaves/pending, dashboard recentLeaves', [
+  measure('hydrated', () => JSON.stringify({ items: leaves.map((raw) => LeaveRequest.hydrate(raw)) })),
+  measure('lean', () => JSON.stringify({ items: projectedLeaves })),
+  measure('lean+dto', () => JSON.stringify({ items: leaves.map(toLeaveDTO) })),
+]);
+
+report('GET /user', [
+  measure('hydrated', () => JSON.stringify(users.map((raw) => User.hydrate(raw)))),
+  measure('lean', () => JSON.stringify(projectedUsers)),
+  measure('lean+dto', () => JSON.stringify(users.map(toUserDTO))),
+]);
@@ -0,0 +1,269 @@
+// Index verification benchmark for the LeaveRequest access paths.
+//
+// Seeds N leave requests into a scratch database, runs each query shape used by
+// app/api/[[...path]]/route.js with explain('executionStats') and fails when a
+// plan scans the collection, sorts in memory or examines more documents than
+// the query can return.
+//
+//   yarn bench:indexes [N] [--memory]
+//
+// Uses MONGO_URL by default; --memory starts mongodb-memory-server instead
+// (install it with `yarn add -D mongodb-memory-server`).
+
+import mongoose from 'mongoose';
+import LeaveRequest from '../models/LeaveRequest.js';
+import { LEAVE_PROJECTION } from '../lib/serializers.js';
+
+const N = parseInt(process.argv.find((arg) => /^\d+$/.test(arg)) || '20000', 10);
+const USE_MEMORY = process.argv.includes('--memory');
+const DB_NAME = 'breakly_explain';
+const EMPLOYEES = 200;
+const TYPES = ['annual', 'sick', 'personal'];
+const DEPARTMENTS = ['Engineering', 'Marketing', 'Sales'];
+const STATUSES = ['approved', 'approved', 'rejected', 'pending'];
+
+const employeeUid = (i) => `explain-emp-${i % EMPLOYEES}`;
+
+async function startServer() {
+  if (!USE_MEMORY) {
+    if (!process.env.MONGO_URL) {
+      throw new Error('Set MONGO_URL or pass --memory');
+    }
+    return { uri: process.env.MONGO_URL, stop: async () => {} };
+  }
+
+  const { MongoMemoryServer } = await import('mongodb-memory-server');
+  const server = await MongoMemoryServer.create();
+  return { uri: server.getUri(), stop: () => server.stop() };
+}
+
+async function seed() {
+  const batchSize = 1000;
+  const base = Date.now() - N * 60 * 1000;
+
+  for (let offset = 0; offset < N; offset += batchSize) {
+    const docs = [];
+    for (let i = offset; i < Math.min(offset + batchSize, N); i++) {
+      const createdAt = new Date(base + i * 60 * 1000);
+      const startDate = new Date(createdAt.getTime() + 14 * 24 * 60 * 60 * 1000);
+      docs.push({
+        id: `explain-${i}`,
+        employeeUid: employeeUid(i),
+        employeeName: `Employee ${i % EMPLOYEES}`,
+        employeeEmail: `${employeeUid(i)}@breakly.test`,
+        department: DEPARTMENTS[(i % EMPLOYEES) % DEPARTMENTS.length],
+        type: TYPES[i % TYPES.length],
+        startDate,
+        endDate: new Date(startDate.getTime() + 2 * 24 * 60 * 60 * 1000),
+        days: 3,
+        status: STATUSES[i % STATUSES.length],
+        createdAt,
+        updatedAt: createdAt,
+      });
+    }
+    await LeaveRequest.collection.insertMany(docs, { ordered: false });
+  }
+}
+
+// Query shapes issued by the API route, with the most documents each may examine
+// (a number, or a function computing the matching count).
+function cases() {
+  const uid = employeeUid(7);
+  const perEmployee = Math.ceil(N / EMPLOYEES);
+  const pending = Math.ceil(N / STATUSES.length);
+
+  return [
+    {
+      name: 'GET /leaves',
+      run: () => pagePipeline({ employeeUid: uid }),
+      maxDocs: PAGE_SIZE + 1,
+    },
+    {
+      name: 'GET /leaves?cursor',
+      run: () => pagePipeline({ employeeUid: uid }, { createdAt: new Date(), id: 'explain-~' }),
+      maxDocs: PAGE_SIZE + 1,
+    },
+    {
+      name: 'GET /leaves/pending',
+      run: () => pagePipeline({ status: 'pending' }),
+      maxDocs: PAGE_SIZE + 1,
+    },
+    {
+      name: 'GET /leaves/pending?cursor',
+      run: () => pagePipeline({ status: 'pending' }, { createdAt: new Date(), id: 'explain-~' }),
+      maxDocs: PAGE_SIZE + 1,
+    },
+    {
+      name: 'GET /team/calendar',
+      run: () => LeaveRequest.find(calendarFilter({ department: 'Sales' })),
+      maxDocs: () => LeaveRequest.countDocuments(calendarFilter({ department: 'Sales' })),
+    },
+    {
+      name: 'GET /team/calendar (all)',
+      run: () => LeaveRequest.find(calendarFilter({})),
+      maxDocs: () => LeaveRequest.countDocuments(calendarFilter({})),
+    },
+    {
+      name: 'dashboard recentLeaves',
+      run: () => LeaveRequest.find({ employeeUid: uid }, LEAVE_PROJECTION).sort({ createdAt: -1 }).limit(5),
+      maxDocs: 5,
+    },
+    {
+      name: 'dashboard pendingCount',
+      run: () => countPipeline({ employeeUid: uid, status: 'pending' }),
+      maxDocs: perEmployee,
+    },
+    {
+      name: 'dashboard pendingApprovals',
+      run: () => countPipeline({ status: 'pending' }),
+      maxDocs: pending,
+    },
+    {
+      name: 'ETag /leaves latest',
+      run: () => LeaveRequest.findOne({ employeeUid: uid }, { _id: 0, updatedAt: 1 }).sort({ updatedAt: -1 }),
+      maxDocs: 0,
+    },
+    {
+      name: 'ETag /leaves/pending latest',
+      run: () => LeaveRequest.findOne({ status: 'pending' }, { _id: 0, updatedAt: 1 }).sort({ updatedAt: -1 }),
+      maxDocs: 0,
+    },
+    {
+      name: 'POST /leaves overlap',
+      run: () => LeaveRequest.findOne({
+        employeeUid: uid,
+        status: { $in: ['pending', 'approved'] },
+        endDate: { $gte: new Date() },
+        startDate: { $lte: new Date(Date.now() + 7 * 24 * 60 * 60 * 1000) },
+      }),
+      maxDocs: 1,
+    },
+    {
+      name: 'org pendingByDepartment',
+      run: () => LeaveRequest.aggregate([
+        { $match: { status: 'pending' } },
+        { $group: { _id: '$department', count: { $sum: 1 } } },
+      ]),
+      maxDocs: pending,
+    },
+    {
+      name: 'org approvalLatency',
+      run: () => LeaveRequest.aggregate([
+        { $match: { approvedAt: { $gte: new Date(Date.now() - 90 * 24 * 60 * 60 * 1000) } } },
+        { $group: { _id: null, average: { $avg: { $subtract: ['$approvedAt', '$createdAt'] } } } },
+      ]),
+      maxDocs: () => LeaveRequest.countDocuments({ approvedAt: { $gte: new Date(Date.now() - 90 * 24 * 60 * 60 * 1000) } }),
+    },
+  ];
+}
+
+// findLeavesPage() in the API route
+const PAGE_SIZE = 50;
+const pagePipeline = (filter, cursor) => LeaveRequest.aggregate([
+  {
+    $match: cursor
+      ? { ...filter, createdAt: { $lte: cursor.createdAt }, $nor: [{ createdAt: cursor.createdAt, id: { $gte: cursor.id } }] }
+      : filter,
+  },
+  { $sort: { createdAt: -1, id: -1 } },
+  { $limit: PAGE_SIZE + 1 },
+  { $project: LEAVE_PROJECTION },
+]);
+
+// handleGetTeamCalendar(): a month window around now
+const calendarFilter = (scope) => {
+  const from = new Date();
+  from.setUTCDate(1);
+  const to = new Date(from.getTime() + 31 * 24 * 60 * 60 * 1000);
+  return { ...scope, status: { $in: ['approved', 'pending'] }, endDate: { $gte: from }, startDate: { $lte: to } };
+};
+
+// countDocuments() runs this pipeline server-side
+const countPipeline = (filter) => LeaveRequest.aggregate([
+  { $match: filter },
+  { $group: { _id: 1, n: { $sum: 1 } } },
+]);
+
+// Collect plan stage names and the docs-examined counter from any explain shape
+// (classic or SBE engine, find or aggregate).
+function summarizePlan(explain) {
+  const stages = new Set();
+  let docsExamined = 0;
+
+  const walk = (node) => {
+    if (Array.isArray(node)) {
+      node.forEach(walk);
+    } else if (node && typeof node === 'object') {
+      if (typeof node.stage === 'string') {
+        stages.add(node.stage);
+      }
+      if (typeof node.totalDocsExamined === 'number') {
+        docsExamined = Math.max(docsExamined, node.totalDocsExamined);
+      }
+      Object.values(node).forEach(walk);
+    }
+  };
+  walk(explain);
+
+  return { stages: [...stages], docsExamined };
+}
+
+function check({ stages, docsExamined }, maxDocs) {
+  const problems = [];
+  if (stages.includes('COLLSCAN')) {
+    problems.push('collection scan');
+  }
+  if (!stages.some((stage) => ['IXSCAN', 'COUNT_SCAN', 'DISTINCT_SCAN'].includes(stage))) {
+    problems.push('no index scan');
+  }
+  if (stages.includes('SORT')) {
+    problems.push('in-memory sort');
+  }
+  if (docsExamined > maxDocs) {
+    problems.push(`examined ${docsExamined} docs (max ${maxDocs})`);
+  }
+  return problems;
+}
+
+async function main() {
+  const server = await startServer();
+  await mongoose.connect(server.uri, { dbName: DB_NAME });
+
+  try {
+    await mongoose.connection.dropDatabase();
+    console.log(`Seeding ${N} leave requests into ${DB_NAME}...`);
+    await seed();
+    await LeaveRequest.syncIndexes();
+
+    let failures = 0;
+    for (const { name, run, maxDocs } of cases()) {
+      const started = performance.now();
+      await run().exec();
+      const elapsed = performance.now() - started;
+
+      const plan = summarizePlan(await run().explain('executionStats'));
+      const problems = check(plan, typeof maxDocs === 'function' ? await maxDocs() : maxDocs);
+      failures += problems.length ? 1 : 0;
+
+      console.log(
+        `${problems.length ? 'FAIL' : 'ok  '}  ${name.padEnd(28)} ${elapsed.toFixed(1).padStart(8)}ms  ` +
+        `docs=${String(plan.docsExamined).padStart(6)}  ${plan.stages.join('>')}` +
+        (problems.length ? `  <- ${problems.join(', ')}` : '')
+      );
+    }
+
+    if (failures) {
+      console.error(`${failures} query shape(s) are not served by an index`);
+      process.exitCode = 1;
+    }
+  } finally {
+    await mongoose.connection.dropDatabase();
+    await mongoose.disconnect();
+    await server.stop();
+  }
+}
+
+main().catch((error) => {
+  console.error(error);
+  process.exit(1);
+});
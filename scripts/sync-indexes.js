@@ -0,0 +1,56 @@
+// Index maintenance: compare the indexes in MongoDB with the ones declared by
+// the schemas, and with --drop bring them in line (Model.syncIndexes), which
+// also removes every index the schemas do not declare.
+//
+// The app itself only ever creates missing indexes. Run this by hand once all
+// instances run the same schemas - never during a rolling deploy, where old
+// and new instances declare different index sets - and check the report for
+// indexes created outside the app before passing --drop.
+//
+//   yarn db:sync-indexes [--drop]
+
+import mongoose from 'mongoose';
+import User from '../models/User.js';
+import LeaveRequest from '../models/LeaveRequest.js';
+import LeaveSummary from '../models/LeaveSummary.js';
+
+const DROP = process.argv.includes('--drop');
+const MODELS = [User, LeaveRequest, LeaveSummary];
+
+const formatIndex = (index) => (typeof index === 'string' ? index : JSON.stringify(index));
+
+async function main() {
+  if (!process.env.MONGO_URL) {
+    throw new Error('Set MONGO_URL');
+  }
+  await mongoose.connect(process.env.MONGO_URL, {
+    dbName: process.env.DB_NAME || 'breakly_db',
+    autoIndex: false,
+  });
+
+  try {
+    for (const model of MODELS) {
+      const { toDrop, toCreate } = await model.diffIndexes();
+      console.log(`\n${model.modelName}`);
+      toCreate.forEach((index) => console.log(`  + ${formatIndex(index)}`));
+      toDrop.forEach((index) => console.log(`  - ${formatIndex(index)}`));
+      if (!toCreate.length && !toDrop.length) {
+        console.log('  up to date');
+      }
+      if (DROP && (toCreate.length || toDrop.length)) {
+        const dropped = await model.syncIndexes();
+        console.log(`  synced, dropped: ${dropped.length ? dropped.join(', ') : 'none'}`);
+      }
+    }
+    if (!DROP) {
+      console.log('\nReport only: pass --drop to create the + indexes and drop the - ones');
+    }
+  } finally {
+    await mongoose.disconnect();
+  }
+}
+
+main().catch((error) => {
+  console.error(error);
+  process.exit(1);
+});
@@ -0,0 +1,37 @@
+import json
+from http.server import BaseHTTPRequestHandler
+
+
+class JSONAPIHandler(BaseHTTPRequestHandler):
+    """
+    Base for the fake APIs the harness tests run against. Subclasses implement
+    respond(body) -> (status, payload) or (status, payload, extra headers);
+    body is the decoded JSON request body, or None when absent or not JSON.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def respond(self, body):
+        raise NotImplementedError
+
+    def _reply(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        try:
+            body = json.loads(raw) if raw else None
+        except ValueError:
+            body = None
+
+        status, payload, *extra = self.respond(body)
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        for name, value in (extra[0] if extra else {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_PUT = _reply
+
+    def log_message(self, *args):
+        pass
@@ -0,0 +1,123 @@
+import threading
+import time
+import uuid
+
+import pytest
+
+from perf_harness import (
+    BENCH_DB_NAME,
+    MONGO_URL,
+    MongoClient,
+    approval_race,
+    local_server,
+    promote_users,
+    reset_database,
+)
+from tests.fake_api import JSONAPIHandler
+
+
+class _LeaveAPI:
+    """In-memory stand-in for the leave endpoints, with an atomic or a read-then-write approval"""
+
+    def __init__(self, atomic):
+        self.atomic = atomic
+        self.lock = threading.Lock()
+        self.balances = {}
+        self.leaves = {}
+
+    def approve(self, leave_id):
+        leave = self.leaves.get(leave_id)
+        if leave is None:
+            return 404, {'error': 'Leave request not found'}
+        if self.atomic:
+            with self.lock:
+                applied = leave['status'] == 'pending'
+                leave['status'] = 'approved'
+                if applied:
+                    self.balances[leave['employeeUid']] -= leave['days']
+        else:
+            # Check, then act: concurrent callers all see 'pending'
+            applied = leave['status'] == 'pending'
+            time.sleep(0.01)
+            leave['status'] = 'approved'
+            if applied:
+                with self.lock:
+                    self.balances[leave['employeeUid']] -= leave['days']
+        return 200, leave
+
+
+def _handler(api):
+    class Handler(JSONAPIHandler):
+        def respond(self, body):
+            body = body or {}
+            token = (self.headers.get('Authorization') or '').replace('Bearer ', '')
+            uid = token.split(':')[1] if token.startswith('stub:') else body.get('idToken', '').split(':')[1]
+
+            if self.path == '/api/auth/register':
+                api.balances.setdefault(uid, 25)
+                return 200, {'success': True}
+            if self.path == '/api/user':
+                return 200, {'uid': uid, 'leaveBalance': {'annual': api.balances[uid]}}
+            if self.path == '/api/leaves':
+                leave = {'id': str(uuid.uuid4()), 'employeeUid': uid, 'days': 1, 'status': 'pending'}
+                api.leaves[leave['id']] = leave
+                return 200, leave
+            return api.approve(body['leaveId'])
+
+    return Handler
+
+
+@pytest.fixture
+def leave_api(request, serve):
+    return serve(_handler(_LeaveAPI(atomic=request.param)))
+
+
+def _no_promotion(uids, role):
+    return True
+
+
+@pytest.mark.parametrize('leave_api', [True], indirect=True)
+def test_atomic_approval_deducts_once(leave_api):
+    result = approval_race(leave_api, leaves=5, racers=6, promote=_no_promotion)
+
+    assert result['actual'] == result['expected'] == 20
+    assert result['statuses'] == {200: 30}
+
+
+@pytest.mark.parametrize('leave_api', [False], indirect=True)
+def test_race_detects_double_deduction(leave_api):
+    result = approval_race(leave_api, leaves=3, racers=6, promote=_no_promotion)
+
+    assert result['actual'] < result['expected']
+
+
+@pytest.fixture(scope='module')
+def stub_auth_server():
+    """The built app with stub auth on a fresh benchmark database, or a skip"""
+    if MongoClient is None:
+        pytest.skip("pymongo is required to promote the race managers")
+    client = MongoClient(MONGO_URL, serverSelectionTimeoutMS=2000)
+    try:
+        client.admin.command('ping')
+    except Exception as error:
+        pytest.skip(f"MongoDB not reachable at {MONGO_URL}: {error}")
+    finally:
+        client.close()
+
+    reset_database(BENCH_DB_NAME)
+    server = local_server(db_name=BENCH_DB_NAME)
+    try:
+        base_url = server.__enter__()
+    except (OSError, RuntimeError) as error:
+        pytest.skip(f"Could not start the app (yarn build first): {error}")
+    yield base_url
+    server.__exit__(None, None, None)
+
+
+def test_real_approval_path_deducts_once(stub_auth_server):
+    result = approval_race(stub_auth_server, leaves=5, racers=8, managers=2,
+                           promote=lambda uids, role: promote_users(uids, role, db_name=BENCH_DB_NAME))
+
+    assert result['actual'] == result['expected']
+    # One approval applies per leave; the other racers see a retry or a conflict
+    assert set(result['statuses']) <= {200, 409}
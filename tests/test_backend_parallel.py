@@ -0,0 +1,65 @@
+import random
+import threading
+import time
+
+import pytest
+import requests
+
+import backend_test
+from backend_test import BreaklyAPITester
+from tests.fake_api import JSONAPIHandler
+
+
+class _JitteryAPIHandler(JSONAPIHandler):
+    """Answers like the unauthenticated API, with random delays to reorder completions"""
+
+    def respond(self, body):
+        time.sleep(random.uniform(0, 0.02))
+        if self.path.rstrip('/') == '/api':
+            return 200, {'message': 'Breakly API - Ready!'}
+        if self.path.startswith('/api/auth/'):
+            return 401, {'error': 'Authentication failed'}
+        return 401, {'error': 'Unauthorized'}
+
+
+@pytest.fixture
+def api_base(serve, monkeypatch):
+    base = f"{serve(_JitteryAPIHandler)}/api"
+    monkeypatch.setattr(backend_test, 'API_BASE', base)
+    return base
+
+
+def _outcomes(tester):
+    return [(r['test'], r['success'], r['message']) for r in tester.test_results]
+
+
+def test_parallel_mode_matches_sequential_output(api_base):
+    sequential = BreaklyAPITester()
+    sequential.run_all_tests()
+
+    parallel = BreaklyAPITester(parallel=True, concurrency=4)
+    parallel.run_all_tests()
+
+    assert _outcomes(parallel) == _outcomes(sequential)
+    assert len(parallel.test_results) > 10
+
+
+def test_parallel_mode_caps_requests_in_flight(api_base, monkeypatch):
+    lock = threading.Lock()
+    state = {'current': 0, 'peak': 0}
+    send = requests.Session.request
+
+    def tracked(session, *args, **kwargs):
+        with lock:
+            state['current'] += 1
+            state['peak'] = max(state['peak'], state['current'])
+        try:
+            return send(session, *args, **kwargs)
+        finally:
+            with lock:
+                state['current'] -= 1
+
+    monkeypatch.setattr(requests.Session, 'request', tracked)
+    BreaklyAPITester(parallel=True, concurrency=2).run_all_tests()
+
+    assert state['peak'] == 2
@@ -0,0 +1,148 @@
+import pytest
+
+from tests.fake_api import JSONAPIHandler
+from perf_harness import (
+    ENDPOINTS,
+    LatencyStats,
+    LoadScenario,
+    budget_violations,
+    fetch_route_timings,
+    find_saturation,
+    parse_server_timing,
+    percentile,
+    run_load,
+    stub_token,
+)
+
+
+ROUTE_TIMINGS = {
+    'GET /leaves': {'count': 10, 'p50': 5.0, 'p95': 12.0, 'p99': 20.0, 'stages': {}},
+    'GET /dashboard/stats': {'count': 4, 'p50': 30.0, 'p95': 250.0, 'p99': 300.0, 'stages': {}},
+}
+
+
+class _StubAPIHandler(JSONAPIHandler):
+    def respond(self, body):
+        status = 500 if self.path.endswith('/leaves/pending') else 200
+        payload = {'routes': ROUTE_TIMINGS} if self.path == '/api/metrics' else {'id': 'leave-1'}
+        return status, payload, {
+            'Server-Timing': 'auth;dur=1.5, mongo.LeaveRequest.find;dur=4;desc="x2", total;dur=7.25',
+        }
+
+
+@pytest.fixture
+def stub_server(serve):
+    return serve(_StubAPIHandler)
+
+
+def test_percentile_interpolates():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == pytest.approx(50.5)
+    assert percentile(values, 99) == pytest.approx(99.01)
+    assert percentile([], 95) == 0.0
+    assert percentile([7], 99) == 7
+
+
+def test_latency_stats_summary_counts_errors():
+    stats = LatencyStats()
+    stats.started, stats.finished = 0.0, 2.0
+    for latency in (10, 20, 30):
+        stats.record('GET /user', latency, ok=True)
+    stats.record('GET /user', 40, ok=False)
+
+    summary = stats.summary()
+    assert summary['GET /user']['count'] == 4
+    assert summary['GET /user']['error_rate'] == 0.25
+    assert summary['ALL']['throughput'] == 2.0
+
+
+def test_find_saturation_detects_flat_throughput():
+    def level(throughput):
+        return {'ALL': {'throughput': throughput}}
+
+    levels = [(1, level(100)), (2, level(190)), (4, level(200)), (8, level(201))]
+    assert find_saturation(levels) == 4
+    assert find_saturation(levels[:2]) is None
+
+
+def test_stub_token_format():
+    assert stub_token('u1') == 'stub:u1:u1@breakly.test'
+
+
+def test_run_load_reports_every_endpoint(stub_server):
+    scenario = LoadScenario(stub_server)
+    scenario.employees = [stub_token('emp')]
+    scenario.manager = stub_token('mgr')
+
+    summary = run_load(scenario, concurrency=4, duration=0.5)
+
+    for name, *_ in ENDPOINTS:
+        assert summary[name]['count'] > 0
+    assert summary['GET /leaves/pending']['error_rate'] == 1.0
+    assert summary['GET /user']['error_rate'] == 0.0
+
+
+def test_run_load_open_loop_respects_rate(stub_server):
+    scenario = LoadScenario(stub_server)
+    scenario.employees = [stub_token('emp')]
+    scenario.manager = stub_token('mgr')
+
+    summary = run_load(scenario, concurrency=4, duration=1.0, rate=40)
+
+    assert 30 <= summary['ALL']['count'] <= 41
+
+
+def test_parse_server_timing():
+    header = 'auth;dur=1.5, mongo.LeaveRequest.find;dur=4;desc="x2", cache;desc="hit", total;dur=7.25'
+    assert parse_server_timing(header) == {
+        'auth': 1.5,
+        'mongo.LeaveRequest.find': 4.0,
+        'total': 7.25,
+    }
+    assert parse_server_timing(None) == {}
+
+
+def test_run_load_records_server_stages(stub_server):
+    scenario = LoadScenario(stub_server)
+    scenario.employees = [stub_token('emp')]
+    scenario.manager = stub_token('mgr')
+
+    summary = run_load(scenario, concurrency=2, duration=0.3, endpoints=[ENDPOINTS[0]])
+
+    assert summary['GET /user']['server']['total'] == {'p50': 7.25, 'p95': 7.25}
+    assert summary['GET /user']['server']['auth']['p95'] == 1.5
+
+
+def test_route_timings_budget(stub_server):
+    timings = fetch_route_timings(stub_server)
+
+    assert timings == ROUTE_TIMINGS
+    assert budget_violations(timings, 100) == ['GET /dashboard/stats p95 250.0ms > 100.0ms']
+    assert budget_violations(timings, 100, routes={'GET /leaves'}) == []
+    assert budget_violations(timings, 10, percentile_key='p50') == ['GET /dashboard/stats p50 30.0ms > 10.0ms']
+
+
+def test_created_leaves_never_overlap_per_employee():
+    scenario = LoadScenario('http://unused')
+    scenario.employees = [stub_token(f'emp{i}') for i in range(3)]
+
+    periods = {}
+    for _ in range(30):
+        token, body = scenario.build('POST', '/leaves')
+        periods.setdefault(token, []).append((body['startDate'], body['endDate']))
+
+    for spans in periods.values():
+        spans.sort()
+        assert all(end < next_start for (_, end), (next_start, _) in zip(spans, spans[1:]))
+
+
+def test_approvals_skipped_without_pending_requests():
+    scenario = LoadScenario('http://unused')
+    scenario.manager = stub_token('mgr')
+
+    assert scenario.build('PUT', '/leaves/approve') is None
+    assert scenario.execute('PUT', '/leaves/approve') is None
+
+    scenario.pending_ids.append('leave-1')
+    token, body = scenario.build('PUT', '/leaves/approve')
+    assert token == scenario.manager and body['leaveId'] == 'leave-1'
@@ -0,0 +1,130 @@
+import itertools
+import threading
+
+import pytest
+
+from perf_harness import (
+    compare_to_baseline,
+    load_baseline,
+    load_traffic,
+    local_server,
+    port_in_use,
+    record_traffic,
+    replay_traffic,
+    save_baseline,
+)
+from tests.fake_api import JSONAPIHandler
+
+
+@pytest.fixture
+def recording_api(serve):
+    """Answers every route; POST /leaves returns a fresh id. Returns (received requests, base URL)"""
+    lock = threading.Lock()
+    received = []
+    ids = itertools.count()
+
+    class Handler(JSONAPIHandler):
+        def respond(self, body):
+            with lock:
+                received.append((self.command, self.path, body))
+                if (self.command, self.path) == ('POST', '/api/leaves'):
+                    return 200, {'id': f"leave-{next(ids)}"}
+            return 200, {}
+
+    return received, serve(Handler)
+
+
+def _summary(p95, throughput=100.0, error_rate=0.0):
+    row = {'p95': p95, 'throughput': throughput, 'error_rate': error_rate}
+    return {'GET /leaves': row, 'ALL': row}
+
+
+def test_recorded_trace_is_deterministic(tmp_path):
+    first = record_traffic(tmp_path / 'a.jsonl', requests_count=200, employees=5, seed_leaves=10, seed=7)
+    second = record_traffic(tmp_path / 'b.jsonl', requests_count=200, employees=5, seed_leaves=10, seed=7)
+
+    assert first == second == load_traffic(tmp_path / 'a.jsonl')
+    measured = [entry for entry in first if not entry.get('seed')]
+    assert len(measured) == 200
+    assert [entry['t'] for entry in measured] == sorted(entry['t'] for entry in measured)
+
+
+def test_recorded_decisions_follow_their_leave(tmp_path):
+    entries = record_traffic(tmp_path / 'trace.jsonl', requests_count=300, employees=4, seed_leaves=2)
+
+    created = set()
+    decided = []
+    for entry in entries:
+        if 'leave' in entry:
+            created.add(entry['leave']['ref'])
+        if 'decision' in entry:
+            assert entry['decision']['ref'] in created
+            assert entry['actor'].startswith('mgr')
+            decided.append(entry['decision']['ref'])
+    assert len(decided) == len(set(decided))
+
+
+def test_replay_resolves_leave_references(recording_api, tmp_path):
+    received, base_url = recording_api
+    entries = record_traffic(tmp_path / 'trace.jsonl', requests_count=150, employees=3, seed_leaves=5)
+    promoted = []
+
+    summary = replay_traffic(base_url, entries, concurrency=4,
+                             promote=lambda uids, role, db_name=None: promoted.append((uids, role)) or True)
+
+    measured = [entry for entry in entries if not entry.get('seed')]
+    assert summary['ALL']['count'] == len(measured)
+    assert summary['ALL']['error_rate'] == 0.0
+    assert sorted(role for _, role in promoted) == ['Manager', 'Manager']
+
+    created_ids = {f"leave-{i}" for i in range(sum('leave' in entry for entry in entries))}
+    approvals = [body for method, path, body in received if path == '/api/leaves/approve']
+    assert len(approvals) == sum('decision' in entry for entry in entries)
+    assert all(body['leaveId'] in created_ids for body in approvals)
+
+
+def test_replay_keeps_recorded_pace(recording_api, tmp_path):
+    _, base_url = recording_api
+    entries = record_traffic(tmp_path / 'trace.jsonl', requests_count=40, rate=100.0, employees=2, seed_leaves=0)
+    span = entries[-1]['t']
+
+    summary = replay_traffic(base_url, entries, concurrency=4, speed=2.0,
+                             promote=lambda *args, **kwargs: True)
+
+    assert summary['ALL']['count'] / summary['ALL']['throughput'] >= span / 2.0
+
+
+def test_compare_to_baseline_flags_regressions():
+    baseline = _summary(p95=40.0)
+
+    assert compare_to_baseline(_summary(p95=45.0), baseline) == []
+    assert compare_to_baseline(_summary(p95=60.0), baseline) == [
+        'ALL p95 40.0ms -> 60.0ms',
+        'GET /leaves p95 40.0ms -> 60.0ms',
+    ]
+    # Slower by more than the ratio but within timing noise
+    assert compare_to_baseline(_summary(p95=3.0), _summary(p95=1.0)) == []
+    assert compare_to_baseline(_summary(p95=40.0, throughput=70.0), baseline) == [
+        'ALL throughput 100.0 -> 70.0 req/s (-30%)',
+    ]
+    assert compare_to_baseline(_summary(p95=40.0, error_rate=0.05), baseline)[0] == 'ALL error rate 0.0% -> 5.0%'
+
+
+def test_baseline_round_trip(tmp_path):
+    path = tmp_path / 'bench' / 'baseline.json'
+    assert load_baseline(path) == (None, None)
+
+    save_baseline(str(path), _summary(p95=12.5), trace='bench/traffic.jsonl', concurrency=8, speed=0.0)
+
+    settings, summary = load_baseline(path)
+    assert settings == {'trace': 'bench/traffic.jsonl', 'concurrency': 8, 'speed': 0.0}
+    assert summary['GET /leaves']['p95'] == 12.5
+
+
+def test_local_server_refuses_a_taken_port(serve):
+    port = int(serve(JSONAPIHandler).rsplit(':', 1)[1])
+
+    assert port_in_use(port)
+    with pytest.raises(RuntimeError, match='already in use'):
+        with local_server(port=port, command='false'):
+            pass